@@ -74,7 +74,8 @@ def create_timeline_chart(df: pd.DataFrame):
         st.info("No timeline data yet. Spin the wheel daily to see trends!")
         return None
     
-    daily_counts = df.groupby('spin_date').size().reset_index(name='count')
+    # df is the daily rollup: one row per date, hour and task
+    daily_counts = df.groupby('spin_date', as_index=False)['spins'].sum().rename(columns={'spins': 'count'})
     daily_counts['spin_date'] = pd.to_datetime(daily_counts['spin_date'])
     
     fig = go.Figure()
@@ -145,14 +146,13 @@ def create_heatmap(df: pd.DataFrame):
         st.info("No heatmap data yet. Build up your history!")
         return None
     
-    df['date'] = pd.to_datetime(df['spun_at']).dt.date
-    df['hour'] = pd.to_datetime(df['spun_at']).dt.hour
+    df['date'] = pd.to_datetime(df['spin_date']).dt.date
     
     pivot = df.pivot_table(
-        index='hour',
+        index='spin_hour',
         columns='date',
-        values='task_name',
-        aggfunc='count',
+        values='spins',
+        aggfunc='sum',
         fill_value=0
     )
     
@@ -179,15 +179,16 @@ def create_heatmap(df: pd.DataFrame):
     
     return fig
 
-def display_statistics(db):
+def display_statistics(db, snapshot: Dict = None):
     col1, col2, col3, col4 = st.columns(4)
     
-    total_spins = len(db.get_spin_history(limit=10000))
-    total_tasks = db.get_task_count()
-    completion_rate = db.get_completion_rate()
+    if snapshot is None:
+        snapshot = db.get_dashboard_snapshot()
     
-    history = db.get_spin_history(limit=7)
-    recent_activity = len(history)
+    total_spins = snapshot['total_spins']
+    total_tasks = snapshot['active_tasks']
+    completion_rate = snapshot['completion_rate']
+    recent_activity = snapshot['spins_last_7_days']
     
     with col1:
         st.metric(
@@ -211,9 +212,54 @@ def display_statistics(db):
     
     with col4:
         if total_spins > 0:
-            task_freq = db.get_task_frequency()
-            most_common = max(task_freq, key=lambda x: x[1])[0] if task_freq else "N/A"
             st.metric(
                 label="Most Spun",
-                value=most_common
+                value=snapshot['most_spun_task'] or "N/A"
             )
+
+def display_performance_panel(instrumentation):
+    # Where the current rerun's time went, plus exports for offline analysis
+    summary = instrumentation.summary()
+    
+    with st.sidebar.expander("Performance", expanded=True):
+        st.caption(f"Rerun so far: {summary['rerun_seconds'] * 1000:.0f} ms")
+        
+        sections = sorted(summary['sections'].items(), key=lambda x: x[1], reverse=True)
+        if sections:
+            st.dataframe(
+                pd.DataFrame(
+                    [(name, round(seconds * 1000, 1)) for name, seconds in sections],
+                    columns=['Section', 'ms']
+                ),
+                hide_index=True,
+                use_container_width=True
+            )
+        
+        st.markdown(
+            f"**{summary['statements']}** statements, {summary['statement_seconds'] * 1000:.0f} ms  \n"
+            f"**{summary['round_trips']}** round trips, {summary['rows']} rows  \n"
+            f"{summary['request_bytes'] / 1024:.1f} KiB sent, {summary['response_bytes'] / 1024:.1f} KiB received"
+        )
+        if summary['errors']:
+            st.warning(f"{summary['errors']} statements failed")
+        
+        slowest = instrumentation.slowest(5)
+        if slowest:
+            st.markdown("**Slowest statements**")
+            for record in slowest:
+                st.caption(f"{record['seconds'] * 1000:.1f} ms · {record['rows']} rows · {record['sql']}")
+        
+        st.download_button(
+            "Prometheus metrics",
+            data=instrumentation.prometheus_text(),
+            file_name="task_spinner_metrics.prom",
+            mime="text/plain",
+            key="perf_export_prometheus"
+        )
+        st.download_button(
+            "JSON lines",
+            data=instrumentation.json_lines(),
+            file_name="task_spinner_rerun.jsonl",
+            mime="application/x-ndjson",
+            key="perf_export_jsonl"
+        )
@@ -1,5 +1,6 @@
 import streamlit as st
-from database import TaskDatabase
+from database import TaskDatabase, secret_settings
+from async_database import load_analytics_page
 from spinner import create_spinner_wheel, select_random_task
 from analytics import (
     create_task_frequency_chart, 
@@ -7,9 +8,13 @@ from analytics import (
     create_timeline_chart,
     create_completion_gauge,
     create_heatmap,
-    display_statistics
+    display_statistics,
+    display_performance_panel
 )
 from reports import display_report_dashboard
+from importer import import_tasks, import_spins
+from scheduler import get_report_scheduler
+from write_behind import get_write_behind_queue
 from datetime import datetime
 import time
 
@@ -105,6 +110,19 @@ if 'spinning' not in st.session_state:
     st.session_state.spinning = False
 
 db = st.session_state.db
+write_queue = get_write_behind_queue(db)
+get_report_scheduler(db)
+perf = db.instrumentation
+perf.start_rerun()
+
+def render_chart(section: str, build, *args):
+    # Figure building and rendering are timed separately for the performance panel
+    with perf.section(f"{section}: figures"):
+        fig = build(*args)
+    if fig:
+        with perf.section(f"{section}: render"):
+            st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 st.sidebar.title("Daily Task Spinner")
 st.sidebar.markdown("---")
@@ -117,16 +135,25 @@ page = st.sidebar.radio(
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("### Quick Stats")
-total_spins = len(db.get_spin_history(limit=10000))
-completion_rate = db.get_completion_rate()
-st.sidebar.metric("Total Spins", total_spins)
-st.sidebar.metric("Completion Rate", f"{completion_rate:.1f}%")
+with perf.section("sidebar: queries"):
+    snapshot = db.get_dashboard_snapshot()
+st.sidebar.metric("Total Spins", snapshot['total_spins'])
+st.sidebar.metric("Completion Rate", f"{snapshot['completion_rate']:.1f}%")
+
+if write_queue:
+    failed = write_queue.failed_ops()
+    if failed:
+        st.sidebar.warning(f"{len(failed)} queued writes were rejected by the database")
+        with st.sidebar.expander("Rejected writes"):
+            for op in failed:
+                st.caption(f"{op['op']} {op.get('spun_at') or op.get('spin_id', '')}: {op['error']}")
 
 if page == "Spinner":
     st.title("Daily Task Spinner")
     st.markdown("### Spin the wheel and commit to your task")
     
-    tasks = db.get_all_tasks()
+    with perf.section("spinner: queries"):
+        tasks = db.get_all_tasks()
     
     if not tasks:
         st.warning("No tasks available. Please add tasks in the Manage Tasks section.")
@@ -135,23 +162,23 @@ if page == "Spinner":
         
         with col1:
             if st.session_state.selected_task:
-                wheel_fig = create_spinner_wheel(tasks, st.session_state.selected_task)
+                render_chart("spinner", create_spinner_wheel, tasks, st.session_state.selected_task)
             else:
-                wheel_fig = create_spinner_wheel(tasks)
-            
-            if wheel_fig:
-                st.plotly_chart(wheel_fig, use_container_width=True)
+                render_chart("spinner", create_spinner_wheel, tasks)
             
             st.markdown("<div style='text-align: center; margin-top: 20px;'>", unsafe_allow_html=True)
             col_spacer1, col_btn, col_spacer2 = st.columns([1, 2, 1])
             with col_btn:
                 if st.button("SPIN THE WHEEL", key="spin_button", use_container_width=True):
                     with st.spinner("Spinning..."):
-                        time.sleep(2)
                         selected = select_random_task(tasks)
                         st.session_state.selected_task = selected
                         
-                        spin_id = db.record_spin(selected['id'])
+                        if write_queue:
+                            # Provisional id now; the row is written in the background
+                            spin_id = write_queue.record_spin(selected['id'])
+                        else:
+                            spin_id = db.record_spin(selected['id'])
                         st.session_state.last_spin_id = spin_id
                         
                         st.success("Task Selected")
@@ -184,16 +211,10 @@ if page == "Spinner":
                 with col_complete1:
                     if st.button("Complete", key="btn_complete", use_container_width=True):
                         if st.session_state.last_spin_id:
-                            db.mark_spin_completed(st.session_state.last_spin_id, True)
-                            if notes:
-                                conn = db.get_connection()
-                                cursor = conn.cursor()
-                                cursor.execute(
-                                    "UPDATE spin_history SET notes = ? WHERE id = ?",
-                                    (notes, st.session_state.last_spin_id)
-                                )
-                                conn.commit()
-                                conn.close()
+                            if write_queue:
+                                write_queue.complete_spin(st.session_state.last_spin_id, notes)
+                            else:
+                                db.complete_spin(st.session_state.last_spin_id, notes)
                             st.success("Task marked as complete")
                             st.session_state.selected_task = None
                             st.session_state.last_spin_id = None
@@ -219,44 +240,35 @@ if page == "Spinner":
 elif page == "Analytics":
     st.title("Analytics Dashboard")
     
-    display_statistics(db)
+    display_statistics(db, snapshot)
     
     st.markdown("---")
     
+    with perf.section("analytics: queries"):
+        analytics = load_analytics_page(db, days=30)
+    
     tab1, tab2, tab3, tab4 = st.tabs(["Overview", "Detailed Stats", "Heatmap", "Insights"])
     
     with tab1:
         col1, col2 = st.columns(2)
         
         with col1:
-            task_freq = db.get_task_frequency()
-            freq_chart = create_task_frequency_chart(task_freq)
-            if freq_chart:
-                st.plotly_chart(freq_chart, use_container_width=True)
+            render_chart("analytics", create_task_frequency_chart, analytics['task_freq'])
         
         with col2:
-            category_stats = db.get_category_stats()
-            pie_chart = create_category_pie_chart(category_stats)
-            if pie_chart:
-                st.plotly_chart(pie_chart, use_container_width=True)
+            render_chart("analytics", create_category_pie_chart, analytics['category_stats'])
         
-        df = db.get_analytics_data(days=30)
-        timeline_chart = create_timeline_chart(df)
-        if timeline_chart:
-            st.plotly_chart(timeline_chart, use_container_width=True)
+        render_chart("analytics", create_timeline_chart, analytics['rollup_df'])
     
     with tab2:
         col1, col2 = st.columns(2)
         
         with col1:
-            completion_rate = db.get_completion_rate()
-            gauge_chart = create_completion_gauge(completion_rate)
-            if gauge_chart:
-                st.plotly_chart(gauge_chart, use_container_width=True)
+            render_chart("analytics", create_completion_gauge, analytics['completion_rate'])
         
         with col2:
             st.markdown("### Category Performance")
-            category_stats = db.get_category_stats()
+            category_stats = analytics['category_stats']
             if category_stats:
                 for stat in category_stats:
                     completed = stat.get('completed', 0) or 0
@@ -270,17 +282,13 @@ elif page == "Analytics":
                 st.info("No category data yet")
     
     with tab3:
-        df = db.get_analytics_data(days=30)
-        heatmap = create_heatmap(df)
-        if heatmap:
-            st.plotly_chart(heatmap, use_container_width=True)
-        else:
+        if not render_chart("analytics", create_heatmap, analytics['rollup_df'].copy()):
             st.info("Build up more history to see the activity heatmap")
     
     with tab4:
         st.markdown("### Key Insights")
         
-        task_freq = db.get_task_frequency()
+        task_freq = analytics['task_freq']
         if task_freq and any(count > 0 for _, count in task_freq):
             most_spun = max(task_freq, key=lambda x: x[1])
             least_spun = min([t for t in task_freq if t[1] > 0], key=lambda x: x[1], default=("None", 0))
@@ -292,7 +300,7 @@ elif page == "Analytics":
                 if least_spun[1] > 0:
                     st.info(f"Least Spun Task: {least_spun[0]} ({least_spun[1]} times)")
             
-            history = db.get_spin_history(limit=1000)
+            history = analytics['history']
             if len(history) >= 7:
                 recent_week = history[:7]
                 last_week = history[7:14] if len(history) >= 14 else []
@@ -309,12 +317,13 @@ elif page == "Analytics":
             st.info("Start spinning to see insights")
 
 elif page == "Reports":
-    display_report_dashboard(db)
+    with perf.section("reports"):
+        display_report_dashboard(db)
 
 elif page == "Manage Tasks":
     st.title("Manage Tasks")
     
-    tab1, tab2 = st.tabs(["Add Task", "Edit Tasks"])
+    tab1, tab2, tab3 = st.tabs(["Add Task", "Edit Tasks", "Import"])
     
     with tab1:
         st.markdown("### Add New Task")
@@ -397,41 +406,103 @@ elif page == "Manage Tasks":
                         time.sleep(1)
                         st.rerun()
 
+        if tasks and st.button("Save All Changes", key="btn_save_all", use_container_width=True):
+            changes = []
+            for task in tasks:
+                change = {
+                    "task_name": st.session_state[f"name_{task['id']}"],
+                    "category": st.session_state[f"category_{task['id']}"],
+                    "priority": st.session_state[f"priority_{task['id']}"],
+                    "active": st.session_state[f"active_{task['id']}"]
+                }
+                current = {
+                    "task_name": task['task_name'],
+                    "category": task['category'],
+                    "priority": task['priority'],
+                    "active": bool(task['active'])
+                }
+                if change != current:
+                    changes.append({"task_id": task['id'], **change})
+
+            if changes:
+                db.update_tasks(changes)
+                st.success(f"Updated {len(changes)} tasks")
+                time.sleep(1)
+                st.rerun()
+            else:
+                st.info("No changes to save")
+    
+    with tab3:
+        st.markdown("### Import from CSV or JSON")
+        st.caption(
+            "Tasks: task_name, category, priority. "
+            "Spin history: task_name or task_id, spun_at, completed, notes."
+        )
+        
+        import_kind = st.radio("Import", ["Tasks", "Spin history"], horizontal=True, key="import_kind")
+        uploaded = st.file_uploader("File", type=["csv", "json"], key="import_file")
+        
+        if uploaded and st.button("Import", key="btn_import", use_container_width=True):
+            try:
+                if import_kind == "Tasks":
+                    count = import_tasks(db, uploaded, uploaded.name)
+                    st.success(f"Imported {count} tasks")
+                else:
+                    result = import_spins(db, uploaded, uploaded.name)
+                    st.success(
+                        f"Imported {result['spins']} spins "
+                        f"({result['tasks_created']} new tasks, {result['skipped']} rows skipped, "
+                        f"{result['rejected']} rejected for an unknown task_id or unreadable spun_at)"
+                    )
+            except Exception as e:
+                st.error(f"Import failed, nothing was saved: {e}")
+
 elif page == "History":
     st.title("Spin History")
     
-    history = db.get_spin_history(limit=100)
+    search_text = st.text_input("Search notes and task names", key="history_search")
+    
+    filter_col1, filter_col2 = st.columns(2)
     
-    if not history:
-        st.info("No history yet. Start spinning to build your history")
+    with filter_col1:
+        filter_completed = st.selectbox(
+            "Filter by status",
+            ["All", "Completed", "Incomplete"],
+            key="filter_status"
+        )
+    
+    with filter_col2:
+        with perf.section("history: queries"):
+            categories = sorted(set(t['category'] for t in db.get_all_tasks(active_only=False)))
+        filter_category = st.selectbox(
+            "Filter by category",
+            ["All"] + categories,
+            key="filter_category"
+        )
+    
+    filters = {}
+    if filter_completed != "All":
+        filters['completed'] = filter_completed == "Completed"
+    if filter_category != "All":
+        filters['category'] = filter_category
+    
+    # Back to the first page whenever the search or filters change
+    search_key = (search_text, filter_completed, filter_category)
+    if st.session_state.get('history_search_key') != search_key:
+        st.session_state.history_search_key = search_key
+        st.session_state.history_page = 1
+    
+    with perf.section("history: queries"):
+        results = db.search_history(search_text, filters, page=st.session_state.history_page)
+    filtered_history = results['rows']
+    
+    if not filtered_history:
+        if search_text or filters:
+            st.info("No spins match your search")
+        else:
+            st.info("No history yet. Start spinning to build your history")
     else:
-        st.markdown(f"### Showing last {len(history)} spins")
-        
-        filter_col1, filter_col2 = st.columns(2)
-        
-        with filter_col1:
-            filter_completed = st.selectbox(
-                "Filter by status",
-                ["All", "Completed", "Incomplete"],
-                key="filter_status"
-            )
-        
-        with filter_col2:
-            filter_category = st.selectbox(
-                "Filter by category",
-                ["All"] + list(set(h['category'] for h in history)),
-                key="filter_category"
-            )
-        
-        filtered_history = history
-        
-        if filter_completed == "Completed":
-            filtered_history = [h for h in filtered_history if h['completed']]
-        elif filter_completed == "Incomplete":
-            filtered_history = [h for h in filtered_history if not h['completed']]
-        
-        if filter_category != "All":
-            filtered_history = [h for h in filtered_history if h['category'] == filter_category]
+        st.markdown(f"### Page {results['page']}")
         
         for i, spin in enumerate(filtered_history):
             spin_time = datetime.fromisoformat(spin['spun_at'])
@@ -461,6 +532,16 @@ elif page == "History":
                             st.rerun()
                 
                 st.markdown("---")
+        
+        prev_col, next_col = st.columns(2)
+        with prev_col:
+            if results['page'] > 1 and st.button("Previous page", use_container_width=True):
+                st.session_state.history_page -= 1
+                st.rerun()
+        with next_col:
+            if results['has_more'] and st.button("Next page", use_container_width=True):
+                st.session_state.history_page += 1
+                st.rerun()
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("### Tips")
@@ -473,3 +554,8 @@ st.sidebar.info("""
 
 st.sidebar.markdown("---")
 st.sidebar.caption("Made with Streamlit")
+
+# Opt-in; [debug] perf_panel = true turns it on by default
+if st.sidebar.checkbox("Performance panel", value=bool(secret_settings("debug").get("perf_panel", False)),
+                       key="perf_panel"):
+    display_performance_panel(perf)
@@ -0,0 +1,77 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor(max_workers: int = 8) -> ThreadPoolExecutor:
+    # Shared by every session, so concurrent reruns can't open unbounded threads
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="taskdb")
+        return _executor
+
+class AsyncTaskDatabase:
+    # Async wrapper around TaskDatabase. Each call runs on a bounded thread
+    # pool, so independent queries overlap their network round trips. The
+    # connection pools and query cache underneath are thread-safe.
+    def __init__(self, db, max_workers: int = 8):
+        self.db = db
+        self.executor = get_executor(max_workers)
+
+    async def _run(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(method, *args, **kwargs))
+
+    async def get_all_tasks(self, active_only: bool = True) -> List[Dict]:
+        return await self._run(self.db.get_all_tasks, active_only)
+
+    async def get_spin_history(self, limit: int = 100) -> List[Dict]:
+        return await self._run(self.db.get_spin_history, limit)
+
+    async def get_analytics_data(self, days: int = 30) -> pd.DataFrame:
+        return await self._run(self.db.get_analytics_data, days)
+
+    async def get_daily_rollup(self, since=None, until=None) -> pd.DataFrame:
+        return await self._run(self.db.get_daily_rollup, since, until)
+    
+    async def get_task_frequency(self) -> List[Tuple[str, int]]:
+        return await self._run(self.db.get_task_frequency)
+
+    async def get_completion_rate(self) -> float:
+        return await self._run(self.db.get_completion_rate)
+
+    async def get_category_stats(self) -> List[Dict]:
+        return await self._run(self.db.get_category_stats)
+
+    async def get_dashboard_snapshot(self) -> Dict:
+        return await self._run(self.db.get_dashboard_snapshot)
+
+async def _gather_analytics(adb: AsyncTaskDatabase, days: int, history_limit: int) -> Dict:
+    since = date.today() - timedelta(days=days)
+    task_freq, category_stats, rollup_df, completion_rate, history = await asyncio.gather(
+        adb.get_task_frequency(),
+        adb.get_category_stats(),
+        adb.get_daily_rollup(since),
+        adb.get_completion_rate(),
+        adb.get_spin_history(history_limit)
+    )
+    return {
+        "task_freq": task_freq,
+        "category_stats": category_stats,
+        "rollup_df": rollup_df,
+        "completion_rate": completion_rate,
+        "history": history
+    }
+
+def load_analytics_page(db, days: int = 30, history_limit: int = 1000) -> Dict:
+    # Everything the Analytics page reads, fetched concurrently. Takes about
+    # as long as the slowest query instead of the sum of all of them.
+    return asyncio.run(_gather_analytics(AsyncTaskDatabase(db), days, history_limit))
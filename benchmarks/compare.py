@@ -0,0 +1,44 @@
+import argparse
+import json
+import sys
+from typing import Dict
+
+# Compares two benchmark result files by median time. Exits with status 1
+# when anything got slower than the threshold allows.
+
+def load(path: str) -> Dict[tuple, Dict]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {(r["backend"], r["spins"], r["name"]): r for r in data["results"]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown, 0.15 = 15%%")
+    parser.add_argument("--min-ms", type=float, default=0.5, help="ignore timings below this")
+    args = parser.parse_args()
+
+    baseline = load(args.baseline)
+    candidate = load(args.candidate)
+    regressions = 0
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before = baseline[key]["median_ms"]
+        after = candidate[key]["median_ms"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > args.threshold and after >= args.min_ms:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -args.threshold and before >= args.min_ms:
+            flag = "  faster"
+        backend, spins, name = key
+        print(f"{backend:6} {spins:>9} {name:40} {before:10.2f} -> {after:10.2f} ms {change:+7.1%}{flag}")
+
+    for key in sorted(candidate.keys() - baseline.keys()):
+        print(f"{key[0]:6} {key[1]:>9} {key[2]:40} new")
+    print(f"{regressions} regressions")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
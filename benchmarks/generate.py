@@ -0,0 +1,106 @@
+import argparse
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from database import TaskDatabase
+
+CATEGORIES = ["Work", "Health", "Learning", "Home", "Social", "Creative", "Errands", "General"]
+VERBS = ["Review", "Write", "Plan", "Clean", "Call", "Read", "Practice", "Fix", "Organize", "Sketch"]
+NOUNS = ["inbox", "report", "garden", "budget", "guitar", "notes", "kitchen", "slides", "backlog", "photos"]
+
+# Relative spin volume per hour of day: quiet nights, a morning peak and a
+# smaller evening one
+HOUR_WEIGHTS = np.array([
+    0.2, 0.1, 0.1, 0.1, 0.1, 0.3, 0.8, 1.6, 2.4, 2.8, 2.6, 2.0,
+    1.6, 1.8, 2.0, 1.8, 1.6, 1.5, 1.8, 2.1, 1.9, 1.3, 0.8, 0.4
+])
+# Monday first, matching date.weekday()
+WEEKDAY_WEIGHTS = np.array([1.15, 1.1, 1.05, 1.0, 0.9, 0.65, 0.6])
+
+def generate_tasks(n_tasks: int, seed: int = 0) -> List[Dict]:
+    rng = np.random.default_rng(seed)
+    tasks = []
+    for i in range(n_tasks):
+        name = f"{VERBS[i % len(VERBS)]} {NOUNS[(i // len(VERBS)) % len(NOUNS)]}"
+        if i >= len(VERBS) * len(NOUNS):
+            name += f" {i // (len(VERBS) * len(NOUNS)) + 1}"
+        tasks.append({
+            "task_name": name,
+            "category": CATEGORIES[int(rng.integers(len(CATEGORIES)))],
+            "priority": int(rng.integers(1, 6))
+        })
+    return tasks
+
+def generate_spins(n_spins: int, task_ids: List[int], priorities: List[int], days: int = 365,
+                   end: date = None, seed: int = 0, chunk_size: int = 50000) -> Iterator[Dict]:
+    # Spins over the days before end (exclusive), oldest first. The same seed,
+    # sizes and end date always give the same rows.
+    rng = np.random.default_rng(seed + 1)
+    end = end or date.today() + timedelta(days=1)
+    start = end - timedelta(days=days)
+
+    # Busier on weekdays, with usage growing slowly over the period
+    weekdays = (np.arange(days) + start.weekday()) % 7
+    day_weights = WEEKDAY_WEIGHTS[weekdays] * np.linspace(0.6, 1.4, days)
+    day = rng.choice(days, size=n_spins, p=day_weights / day_weights.sum())
+    hour = rng.choice(24, size=n_spins, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    second = rng.integers(0, 3600, size=n_spins)
+    offsets = np.sort(day * 86400 + hour * 3600 + second)
+    spun_at = np.datetime64(start, "s") + offsets.astype("timedelta64[s]")
+    spun_at = np.char.replace(np.datetime_as_string(spun_at, unit="s"), "T", " ")
+
+    # A few favourite tasks get most of the spins
+    popularity = 1.0 / np.arange(1, len(task_ids) + 1) ** 0.8
+    popularity = rng.permutation(popularity)
+    task_index = rng.choice(len(task_ids), size=n_spins, p=popularity / popularity.sum())
+    # Higher priority tasks are finished more often
+    completion_odds = 0.45 + 0.08 * np.asarray(priorities)[task_index]
+    completed = rng.random(n_spins) < completion_odds
+    has_note = rng.random(n_spins) < 0.1
+
+    ids = np.asarray(task_ids)
+    for begin in range(0, n_spins, chunk_size):
+        for i in range(begin, min(begin + chunk_size, n_spins)):
+            yield {
+                "task_id": int(ids[task_index[i]]),
+                "spun_at": str(spun_at[i]),
+                "completed": bool(completed[i]),
+                "notes": f"Note {i}" if has_note[i] else ""
+            }
+
+def populate(db: TaskDatabase, n_tasks: int, n_spins: int, days: int = 365,
+             end: date = None, seed: int = 0) -> Dict:
+    # Fills an empty database and returns what was written
+    started = datetime.now()
+    db.add_tasks_bulk(generate_tasks(n_tasks, seed), batch_size=1000)
+    tasks = db.get_all_tasks(active_only=False)
+    spins = db.record_spins_bulk(
+        generate_spins(n_spins, [t['id'] for t in tasks], [t['priority'] for t in tasks], days, end, seed),
+        batch_size=5000
+    )
+    return {
+        "tasks": len(tasks),
+        "spins": spins,
+        "days": days,
+        "seed": seed,
+        "seconds": (datetime.now() - started).total_seconds()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a local database with synthetic tasks and spins")
+    parser.add_argument("--db-path", default="benchmark.db")
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--spins", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="last day + 1, YYYY-MM-DD")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    db = TaskDatabase(args.db_path, local_only=True)
+    result = populate(db, args.tasks, args.spins, args.days, args.end, args.seed)
+    print(f"Wrote {result['tasks']} tasks and {result['spins']} spins in {result['seconds']:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+import analytics
+import reports
+import spinner
+from benchmarks.generate import populate
+from cache import QueryCache, ReportCache
+from database import TaskDatabase
+from turso_emulator import TursoEmulator
+
+# Times every TaskDatabase query, report generator and figure builder across
+# data sizes, on local SQLite and on the HTTP path against the local Turso
+# emulator. Run from the repository root:
+#
+#   python -m benchmarks.run --spins 1000,100000,1000000
+#   python -m benchmarks.run --backends turso --turso-latency-ms 40 --turso-jitter-ms 20
+#   python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+
+def time_call(fn: Callable, repeats: int, warmup: int = 1) -> Dict:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "repeats": repeats,
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "max_ms": max(timings)
+    }
+
+def query_targets(db: TaskDatabase) -> List[Tuple[str, Callable]]:
+    month_ago = date.today() - timedelta(days=30)
+    return [
+        ("db.get_all_tasks", lambda: db.get_all_tasks(active_only=False)),
+        ("db.get_task_by_id", lambda: db.get_task_by_id(1)),
+        ("db.get_task_count", db.get_task_count),
+        ("db.get_spin_history", lambda: db.get_spin_history(limit=100)),
+        ("db.search_history", lambda: db.search_history("note", page=2)),
+        ("db.iter_spin_history[30d]", lambda: sum(1 for _ in db.iter_spin_history(since=month_ago))),
+        ("db.get_analytics_data[30d]", lambda: db.get_analytics_data(days=30)),
+        ("db.get_daily_rollup[30d]", lambda: db.get_daily_rollup(since=month_ago)),
+        ("db.get_spins_frame[30d]", lambda: db.get_spins_frame(month_ago, date.today())),
+        ("db.get_report_aggregates[30d]", lambda: db.get_report_aggregates(month_ago, date.today())),
+        ("db.get_task_frequency", db.get_task_frequency),
+        ("db.get_completion_rate", db.get_completion_rate),
+        ("db.get_dashboard_snapshot", db.get_dashboard_snapshot),
+        ("db.get_category_stats", db.get_category_stats),
+    ]
+
+def report_targets(db: TaskDatabase) -> List[Tuple[str, Callable]]:
+    return [
+        ("reports.generate_daily_report", lambda: reports.generate_daily_report(db)),
+        ("reports.generate_weekly_report", lambda: reports.generate_weekly_report(db)),
+        ("reports.generate_monthly_report", lambda: reports.generate_monthly_report(db)),
+    ]
+
+def figure_targets(db: TaskDatabase) -> List[Tuple[str, Callable]]:
+    # Inputs are fetched once, so only the figure building is timed
+    tasks = db.get_all_tasks()
+    task_freq = db.get_task_frequency()
+    category_stats = db.get_category_stats()
+    completion_rate = db.get_completion_rate()
+    rollup = db.get_daily_rollup(since=date.today() - timedelta(days=30))
+    return [
+        ("analytics.create_task_frequency_chart", lambda: analytics.create_task_frequency_chart(task_freq)),
+        ("analytics.create_category_pie_chart", lambda: analytics.create_category_pie_chart(category_stats)),
+        ("analytics.create_timeline_chart", lambda: analytics.create_timeline_chart(rollup)),
+        ("analytics.create_completion_gauge", lambda: analytics.create_completion_gauge(completion_rate)),
+        ("analytics.create_heatmap", lambda: analytics.create_heatmap(rollup.copy())),
+        ("spinner.create_spinner_wheel", lambda: spinner.create_spinner_wheel(tasks)),
+    ]
+
+def uncached(db: TaskDatabase) -> TaskDatabase:
+    # Every repeat should reach the database
+    db.query_cache = QueryCache(max_entries=0, ttl_seconds=0)
+    db.report_cache = ReportCache(max_entries=0)
+    return db
+
+def run_size(workdir: str, n_tasks: int, n_spins: int, args) -> List[Dict]:
+    db_path = os.path.join(workdir, f"bench_{n_spins}.db")
+    local_db = uncached(TaskDatabase(db_path, local_only=True))
+    generated = populate(local_db, n_tasks, n_spins, args.days, args.end, args.seed)
+    print(f"  generated {generated['spins']} spins in {generated['seconds']:.1f}s")
+
+    backends = {}
+    emulator = None
+    if "sqlite" in args.backends:
+        backends["sqlite"] = local_db
+    if "turso" in args.backends:
+        emulator = TursoEmulator(
+            db_path, latency_ms=args.turso_latency_ms, jitter_ms=args.turso_jitter_ms, seed=args.seed
+        ).start()
+        backends["turso"] = uncached(TaskDatabase(db_path, turso_url=emulator.url, turso_token="benchmark"))
+
+    results = []
+    try:
+        for backend, db in backends.items():
+            targets = query_targets(db) + report_targets(db)
+            if backend == "sqlite":
+                # Figure builders don't depend on the backend
+                targets += figure_targets(db)
+            for name, fn in targets:
+                timing = time_call(fn, args.repeats)
+                print(f"  {backend:6} {name:40} {timing['median_ms']:10.2f} ms")
+                results.append({"backend": backend, "tasks": n_tasks, "spins": n_spins, "name": name, **timing})
+    finally:
+        if emulator is not None:
+            emulator.stop()
+    return results
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark queries, reports and figures across data sizes")
+    parser.add_argument("--spins", default="1000,10000,100000", help="comma-separated spin counts")
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="last day + 1, YYYY-MM-DD")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--backends", default="sqlite,turso")
+    parser.add_argument("--turso-latency-ms", type=float, default=0.0, help="emulated network latency")
+    parser.add_argument("--turso-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+    args.backends = args.backends.split(",")
+
+    commit = git_commit()
+    started = datetime.now()
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_spins in (int(n) for n in args.spins.split(",")):
+            print(f"{args.tasks} tasks, {n_spins} spins")
+            results += run_size(workdir, args.tasks, n_spins, args)
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"{started.strftime('%Y%m%d-%H%M%S')}-{commit}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "commit": commit,
+                "started_at": started.isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "tasks": args.tasks,
+                "days": args.days,
+                "seed": args.seed,
+                "repeats": args.repeats,
+                "turso_latency_ms": args.turso_latency_ms,
+                "turso_jitter_ms": args.turso_jitter_ms
+            },
+            "results": results
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+def _group(key: Hashable) -> Hashable:
+    # Keys are (query name, args, kwargs); entries are invalidated by name
+    return key[0] if isinstance(key, tuple) else key
+
+class QueryCache:
+    # LRU + TTL cache for read query results. Every write bumps data_version,
+    # which invalidates everything cached before it without scanning entries.
+    # Writes that only a few queries read can invalidate just those.
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.data_version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (data_version, stored_at, value)
+        self._generations = {}  # query name -> times invalidated on its own
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                version, stored_at, value = entry
+                if version == self.data_version and time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def _generation(self, key: Hashable) -> int:
+        with self._lock:
+            return self._generations.get(_group(key), 0)
+
+    def _store(self, key: Hashable, version: int, generation: int, value: Any):
+        with self._lock:
+            # A write landed while we were loading; the result may already be stale
+            if version != self.data_version or generation != self._generations.get(_group(key), 0):
+                return
+            self._entries[key] = (version, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return loader()
+
+        found, value = self._lookup(key)
+        if not found:
+            version = self.data_version
+            generation = self._generation(key)
+            value = loader()
+            self._store(key, version, generation, value)
+        # Callers are free to mutate what they get back (e.g. add DataFrame columns)
+        return copy.deepcopy(value)
+
+    def bump_version(self):
+        with self._lock:
+            self.data_version += 1
+            self._entries.clear()
+
+    def invalidate(self, *names: str):
+        # Drops the cached results of the named queries only
+        with self._lock:
+            for name in names:
+                self._generations[name] = self._generations.get(name, 0) + 1
+            for key in [key for key in self._entries if _group(key) in names]:
+                del self._entries[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups * 100) if lookups else 0,
+                "entries": len(self._entries),
+                "data_version": self.data_version
+            }
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_query_cache(database_key: str, **settings) -> QueryCache:
+    # One cache per database per process, so a write from any session
+    # invalidates the reads of every other session
+    with _caches_lock:
+        if database_key not in _caches:
+            _caches[database_key] = QueryCache(**settings)
+        return _caches[database_key]
+
+class ReportCache:
+    # LRU of built reports, keyed by (report type, period bounds). Each entry
+    # remembers the data version it was built from, so the caller decides
+    # whether it is still current. With a path, entries are kept in a JSON
+    # file and survive restarts.
+    def __init__(self, max_entries: int = 64, path: str = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (data_version, value)
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    for key, version, value in json.load(f):
+                        self._entries[tuple(key)] = (version, value)
+            except (OSError, ValueError, TypeError) as e:
+                print(f"Ignoring unreadable report cache {path}: {e}")
+
+    def get(self, key: Tuple[str, ...]) -> Optional[Tuple[Any, Any]]:
+        # (data_version, value) for key, or None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Tuple[str, ...], version: Any, value: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._save()
+
+    def _save(self):
+        # Written whole and swapped in, so a crash never leaves half a file
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump([[list(key), version, value] for key, (version, value) in self._entries.items()], f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save report cache {self.path}: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups * 100) if lookups else 0,
+                "entries": len(self._entries)
+            }
+
+_report_caches = {}
+
+def get_report_cache(database_key: str, **settings) -> ReportCache:
+    with _caches_lock:
+        if database_key not in _report_caches:
+            _report_caches[database_key] = ReportCache(**settings)
+        return _report_caches[database_key]
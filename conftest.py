@@ -0,0 +1,2 @@
+# Puts the repo root on sys.path so tests/ can import the app modules
+# under a plain `pytest` run
@@ -1,12 +1,31 @@
 import os
 import json
 import base64
-from datetime import datetime, timedelta
+import functools
+import heapq
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
 from typing import List, Dict, Optional, Tuple, Any, Union
+import numpy as np
 import pandas as pd
 
+from cache import get_query_cache, get_report_cache
+from instrumentation import Instrumentation
+from migrations import NOW_MS, apply_migrations, rollup_backfill
+from replica import SYNC_OVERLAP, get_replica
+from resilience import (
+    CircuitBreaker,
+    ResilientCaller,
+    RetryPolicy,
+    get_resilient_caller,
+    is_read_only_sql
+)
+
 try:
     import requests
+    from requests.adapters import HTTPAdapter
     REQUESTS_AVAILABLE = True
 except ImportError:
     REQUESTS_AVAILABLE = False
@@ -23,17 +42,46 @@ try:
 except ImportError:
     STREAMLIT_AVAILABLE = False
 
+DATE_DECLTYPES = ("DATE", "DATETIME", "TIMESTAMP")
+
+class TursoStatementError(RuntimeError):
+    # The server ran a statement and rejected it (a constraint, a type
+    # mismatch, bad SQL), as opposed to a request that never got an answer
+    pass
+
+def decode_column(cells: List[Dict], decltype: str = None, parse_date: bool = False,
+                  categorical: bool = False):
+    # Turns one column of Hrana cells into a typed array: int64 (float64 if
+    # there are NULLs), float64, datetime64, categorical or plain objects.
+    # Dates that aren't ISO 8601 become NaT, as read_sql_query does locally.
+    types = {cell.get("type") for cell in cells}
+    has_nulls = "null" in types
+    types.discard("null")
+
+    if types == {"integer"} and not has_nulls:
+        return np.fromiter((int(cell["value"]) for cell in cells), dtype=np.int64, count=len(cells))
+    if types and types <= {"integer", "float"}:
+        return np.array([float(cell["value"]) if cell.get("type") != "null" else np.nan for cell in cells],
+                        dtype=np.float64)
+
+    values = [cell.get("value") for cell in cells]
+    if types == {"blob"}:
+        return np.array([base64.b64decode(cell["base64"]) if cell.get("type") == "blob" else None
+                         for cell in cells], dtype=object)
+    if parse_date or (decltype or "").upper() in DATE_DECLTYPES:
+        return pd.to_datetime(pd.Series(values, dtype=object), format="ISO8601", errors="coerce").to_numpy()
+    if categorical:
+        return pd.Categorical(values)
+    return np.array(values, dtype=object)
+
 class TursoHTTPCursor:
     def __init__(self, connection):
         self.connection = connection
         self.lastrowid = None
         self.rowcount = -1
-        self.rows = []
-        self.columns = []
-        self.row_index = 0
+        self._set_result([], [])
 
-    def execute(self, sql: str, parameters: tuple = ()) -> 'TursoHTTPCursor':
-        # Prepare arguments
+    def _encode_args(self, parameters: tuple) -> List[Dict]:
         args = []
         for param in parameters:
             if param is None:
@@ -50,94 +98,145 @@ class TursoHTTPCursor:
             else:
                 # Fallback to string
                 args.append({"type": "text", "value": str(param)})
+        return args
 
-        payload = {
-            "requests": [
-                {
-                    "type": "execute",
-                    "stmt": {
-                        "sql": sql,
-                        "args": args
-                    }
-                },
-                {
-                    "type": "close"
-                }
-            ]
-        }
+    def _parse_result(self, exec_result: Dict) -> Tuple[List[Dict], List[list]]:
+        # Returns the column metadata and the still-encoded rows. Cells are
+        # only decoded once the caller asks for rows, tuples or columns.
+        if exec_result.get("type") == "error":
+            message = exec_result.get('error', {}).get('message')
+            if self.connection.in_transaction:
+                # Surface the failure so the caller can roll the transaction back
+                raise TursoStatementError(f"Turso API Error: {message}")
+            print(f"Turso API Error: {message}")
+            return [], []
 
-        headers = {
-            "Authorization": f"Bearer {self.connection.token}",
-            "Content-Type": "application/json"
-        }
+        # The actual data is nested under "result" in the response
+        result = exec_result.get("response", {}).get("result", {})
+        return result.get("cols", []), result.get("rows", [])
 
-        # Construct URL correctly
-        url = self.connection.url
-        if not url.endswith('/v2/pipeline'):
-            if url.endswith('/'):
-                url = url + 'v2/pipeline'
-            else:
-                url = url + '/v2/pipeline'
-        
-        # Handle libsql:// protocol replacement if present
-        url = url.replace("libsql://", "https://")
+    def _decode_rows(self, raw_rows: List[list]) -> List[tuple]:
+        parsed_rows = []
+        for row in raw_rows:
+            parsed_row = []
+            for cell in row:
+                val = cell.get("value")
+                if cell.get("type") == "integer":
+                    val = int(val)
+                elif cell.get("type") == "float":
+                    val = float(val)
+                elif cell.get("type") == "blob":
+                    val = base64.b64decode(cell.get("base64", val))
+                # text and null are handled naturally
+                parsed_row.append(val)
+            parsed_rows.append(tuple(parsed_row))
+        return parsed_rows
 
-        try:
-            response = requests.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Reset state
-            self.rows = []
-            self.columns = []
-            self.row_index = 0
-            self.lastrowid = None # Not always available in HTTP API easily without extra query
-            
-            # Parse results
-            results = data.get("results", [])
-            if results:
-                # First result corresponds to execute
-                exec_result = results[0]
-                if exec_result.get("type") == "ok":
-                    resp = exec_result.get("response", {})
-                    
-                    # CRITICAL FIX: The actual data is nested under "result" in the response!
-                    result = resp.get("result", {})
-                    
-                    # Columns
-                    cols = result.get("cols", [])
-                    self.columns = [c["name"] for c in cols]
-                    
-                    # Rows
-                    result_rows = result.get("rows", [])
-                    parsed_rows = []
-                    for row in result_rows:
-                        parsed_row = []
-                        for cell in row:
-                            val = cell.get("value")
-                            if cell.get("type") == "integer":
-                                val = int(val)
-                            elif cell.get("type") == "float":
-                                val = float(val)
-                            elif cell.get("type") == "blob":
-                                val = base64.b64decode(val)
-                            # text and null are handled naturally
-                            parsed_row.append(val)
-                        parsed_rows.append(tuple(parsed_row))
-                    
-                    self.rows = parsed_rows
-                    self.rowcount = len(parsed_rows)
-                elif exec_result.get("type") == "error":
-                    print(f"Turso API Error: {exec_result.get('message')}")
-            else:
-                 print(f"Turso API returned no results. Data: {data}")
+    def _run_pipeline(self, statements: List[Tuple[str, tuple]]) -> List[Tuple[List[Dict], List[list]]]:
+        requests_list = [
+            {"type": "execute", "stmt": {"sql": sql, "args": self._encode_args(params)}}
+            for sql, params in statements
+        ]
 
+        connection = self.connection
+        instrumentation = connection.instrumentation
+        start = time.perf_counter()
+        before = (connection.round_trips, connection.request_bytes, connection.response_bytes)
+        try:
+            results = connection.send_requests(requests_list)
         except Exception as e:
             print(f"Turso HTTP Error: {e}")
+            if instrumentation is not None:
+                self._record(instrumentation, statements, start, before, [], str(e))
             raise e
 
+        if instrumentation is not None:
+            errors = [r.get("error", {}).get("message") for r in results if r.get("type") == "error"]
+            self._record(instrumentation, statements, start, before, results, errors[0] if errors else None)
+        if not results:
+            print("Turso API returned no results.")
+        parsed = [self._parse_result(r) for r in results]
+        parsed += [([], [])] * (len(statements) - len(parsed))
+        return parsed
+
+    def _record(self, instrumentation, statements: List[Tuple[str, tuple]], start: float,
+                before: Tuple[int, int, int], results: List[Dict], error: str = None):
+        # One record per pipeline request; bytes and round trips include retries
+        connection = self.connection
+        instrumentation.record_statement(
+            "turso",
+            statements[0][0] if len(statements) == 1 else f"{statements[0][0]} (+{len(statements) - 1} more)",
+            time.perf_counter() - start,
+            round_trips=connection.round_trips - before[0],
+            rows=sum(len(r.get("response", {}).get("result", {}).get("rows", [])) for r in results),
+            request_bytes=connection.request_bytes - before[1],
+            response_bytes=connection.response_bytes - before[2],
+            statements=len(statements),
+            error=error
+        )
+
+    def _set_result(self, cols: List[Dict], raw_rows: List[list]):
+        self.cols = cols
+        self.columns = [c["name"] for c in cols]
+        self.raw_rows = raw_rows
+        self._rows = None
+        self.rowcount = len(raw_rows)
+        self.row_index = 0
+        self.lastrowid = None # Not always available in HTTP API easily without extra query
+
+    @property
+    def rows(self) -> List[tuple]:
+        if self._rows is None:
+            self._rows = self._decode_rows(self.raw_rows)
+        return self._rows
+
+    def execute(self, sql: str, parameters: tuple = ()) -> 'TursoHTTPCursor':
+        self._set_result(*self._run_pipeline([(sql, parameters)])[0])
+        return self
+
+    def execute_many_statements(self, statements: List[Tuple[str, tuple]]) -> List[List[Union[Dict, Tuple]]]:
+        # Sends every statement in a single /v2/pipeline request and returns
+        # one result set per statement. The cursor is left on the last one.
+        if not statements:
+            return []
+        parsed = self._run_pipeline(statements)
+        self._set_result(*parsed[-1])
+        results = []
+        for cols, raw_rows in parsed:
+            rows = self._decode_rows(raw_rows)
+            if self.connection.row_factory:
+                columns = [c["name"] for c in cols]
+                rows = [dict(zip(columns, r)) for r in rows]
+            results.append(rows)
+        return results
+
+    def executemany(self, sql: str, seq_of_parameters) -> 'TursoHTTPCursor':
+        # One pipeline request for the whole sequence; callers chunk it
+        statements = [(sql, params) for params in seq_of_parameters]
+        if statements:
+            self.execute_many_statements(statements)
+            self.rowcount = len(statements)
         return self
 
+    def fetch_columns(self, parse_dates: List[str] = (), categories: List[str] = ()) -> Dict[str, Any]:
+        # Decodes the remaining rows column by column straight into typed
+        # arrays, skipping the per-row tuples and dicts
+        raw_rows = self.raw_rows[self.row_index:]
+        self.row_index = self.rowcount
+        return {
+            col["name"]: decode_column(
+                [row[i] for row in raw_rows],
+                decltype=col.get("decltype"),
+                parse_date=col["name"] in parse_dates,
+                categorical=col["name"] in categories
+            )
+            for i, col in enumerate(self.cols)
+        }
+
+    def fetch_dataframe(self, parse_dates: List[str] = (), categories: List[str] = ()) -> pd.DataFrame:
+        columns = self.fetch_columns(parse_dates, categories)
+        return pd.DataFrame(columns, columns=self.columns, copy=False)
+
     def fetchone(self) -> Optional[Union[Dict, Tuple]]:
         if self.row_index < len(self.rows):
             row = self.rows[self.row_index]
@@ -159,93 +258,549 @@ class TursoHTTPCursor:
     def close(self):
         pass
 
+class TursoSessionPool:
+    # Keep-alive HTTP sessions shared across connections, so each statement
+    # reuses an open TCP/TLS connection instead of paying a new handshake.
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0, idle_timeout: float = 60.0):
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.idle_timeout = idle_timeout
+        self._idle = []  # (session, last_used) pairs, most recently used last
+        self._lock = threading.Lock()
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _evict_idle(self, now: float):
+        expired = [s for s, last_used in self._idle if now - last_used > self.idle_timeout]
+        self._idle = [(s, t) for s, t in self._idle if now - t <= self.idle_timeout]
+        for session in expired:
+            session.close()
+
+    def acquire(self):
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            if self._idle:
+                return self._idle.pop()[0]
+        return self._new_session()
+
+    def release(self, session):
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append((session, time.monotonic()))
+                return
+        session.close()
+
+    def post(self, url: str, **kwargs):
+        session = self.acquire()
+        try:
+            response = session.post(url, timeout=self.timeout, **kwargs)
+        except Exception:
+            # Don't hand a session with a broken connection to the next caller
+            session.close()
+            raise
+        self.release(session)
+        return response
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session, _ in idle:
+            session.close()
+
+_session_pool = None
+_session_pool_lock = threading.Lock()
+
+def get_session_pool(**settings) -> TursoSessionPool:
+    # One pool per process; the first caller's settings win
+    global _session_pool
+    with _session_pool_lock:
+        if _session_pool is None:
+            _session_pool = TursoSessionPool(**settings)
+        return _session_pool
+
+def pipeline_url(url: str) -> str:
+    if not url.endswith('/v2/pipeline'):
+        if url.endswith('/'):
+            url = url + 'v2/pipeline'
+        else:
+            url = url + '/v2/pipeline'
+
+    # Handle libsql:// protocol replacement if present
+    return url.replace("libsql://", "https://")
+
 class TursoHTTPConnection:
-    def __init__(self, url, token):
+    def __init__(self, url, token, pool: TursoSessionPool = None, caller: ResilientCaller = None,
+                 instrumentation: Instrumentation = None):
         self.url = url
         self.token = token
         self.row_factory = True  # Enable dict conversion for rows
+        self.pool = pool or get_session_pool()
+        self.caller = caller or get_resilient_caller(url)
+        self.pipeline_url = pipeline_url(url)
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json"
+        }
+        # Interactive transaction state. The baton identifies the open
+        # server-side stream and changes with every response.
+        self.in_transaction = False
+        self.baton = None
+        self.stream_url = None
+        # Traffic counters, read by the cursor around each request
+        self.instrumentation = instrumentation
+        self.round_trips = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def pipeline(self, payload: dict) -> dict:
+        url = self.stream_url or self.pipeline_url
+        body = json.dumps(payload)
+        response = self.pool.post(url, data=body, headers=self.headers)
+        self.round_trips += 1
+        self.request_bytes += len(body)
+        self.response_bytes += len(response.content)
+        response.raise_for_status()
+        return response.json()
+
+    def _reset_stream(self):
+        self.in_transaction = False
+        self.baton = None
+        self.stream_url = None
+
+    def send_requests(self, requests_list: List[Dict]) -> List[Dict]:
+        # Outside a transaction every call opens and closes its own stream
+        # (auto-commit). Inside one, the stream stays open: BEGIN rides along
+        # with the first statements and the baton is carried between calls.
+        prefix = []
+        if self.in_transaction and self.baton is None:
+            prefix = [{"type": "execute", "stmt": {"sql": "BEGIN", "args": []}}]
+        suffix = [] if self.in_transaction else [{"type": "close"}]
+
+        payload = {"requests": prefix + requests_list + suffix}
+        if self.baton:
+            payload["baton"] = self.baton
+
+        # Only stand-alone reads may be retried or hedged; anything on an
+        # open stream or that writes could end up applied twice
+        idempotent = not self.in_transaction and self.baton is None and all(
+            is_read_only_sql(r["stmt"]["sql"]) for r in requests_list if r["type"] == "execute"
+        )
+
+        try:
+            data = self.caller.call(lambda: self.pipeline(payload), idempotent)
+        except Exception:
+            # The server drops the stream (and the transaction) with it
+            self._reset_stream()
+            raise
+
+        results = data.get("results", [])
+        if self.in_transaction:
+            self.baton = data.get("baton")
+            if data.get("base_url"):
+                self.stream_url = pipeline_url(data["base_url"])
+            if prefix and results and results[0].get("type") == "error":
+                self._reset_stream()
+                raise RuntimeError(f"Turso API Error: {results[0].get('error', {}).get('message')}")
+        else:
+            self._reset_stream()
+
+        return results[len(prefix):len(prefix) + len(requests_list)]
+
+    def begin(self):
+        # No round trip here; BEGIN is sent with the next statement
+        self.in_transaction = True
+
+    def _end_transaction(self, sql: str):
+        if self.baton is None:
+            # Nothing was sent since begin(), so there is no stream to end
+            self._reset_stream()
+            return
+        self.in_transaction = False
+        results = self.send_requests([{"type": "execute", "stmt": {"sql": sql, "args": []}}])
+        if results and results[0].get("type") == "error":
+            raise RuntimeError(f"Turso API Error: {results[0].get('error', {}).get('message')}")
 
     def cursor(self):
         return TursoHTTPCursor(self)
 
     def commit(self):
-        # HTTP API is auto-commit for single requests usually
-        pass
+        # Statements outside begin() are already auto-committed
+        if self.in_transaction:
+            self._end_transaction("COMMIT")
+
+    def rollback(self):
+        if self.in_transaction:
+            self._end_transaction("ROLLBACK")
 
     def close(self):
+        # Like sqlite3, closing discards a transaction that was never committed
+        if self.in_transaction:
+            try:
+                self.rollback()
+            except Exception as e:
+                print(f"Turso rollback on close failed: {e}")
+
+class InstrumentedSQLiteCursor(sqlite3.Cursor):
+    # Times each statement and counts the rows fetched from it, when the
+    # connection has an Instrumentation attached
+    record = None
+
+    def _timed(self, method, sql: str, *args):
+        instrumentation = self.connection.instrumentation
+        if instrumentation is None:
+            return method(sql, *args)
+        start = time.perf_counter()
+        error = None
+        try:
+            return method(sql, *args)
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.record = instrumentation.record_statement(
+                "sqlite", sql, time.perf_counter() - start, request_bytes=len(sql), error=error
+            )
+
+    def _counted(self, method, *args) -> list:
+        if self.record is None or self.connection.instrumentation is None:
+            return method(*args)
+        start = time.perf_counter()
+        rows = method(*args)
+        self.connection.instrumentation.add_rows(self.record, len(rows), time.perf_counter() - start)
+        return rows
+
+    def execute(self, sql: str, parameters=()):
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def fetchone(self):
+        rows = self._counted(super().fetchmany, 1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size: int = None):
+        return self._counted(super().fetchmany, size or self.arraysize)
+
+    def fetchall(self):
+        return self._counted(super().fetchall)
+
+class PooledSQLiteConnection(sqlite3.Connection):
+    # close() hands the connection back to its pool instead of closing the file
+    pool = None
+    instrumentation = None
+
+    def cursor(self, factory=InstrumentedSQLiteCursor):
+        return super().cursor(factory)
+
+    # The built-in shortcuts don't go through cursor()
+    def execute(self, sql: str, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+            return
+        if self.in_transaction:
+            self.rollback()
+        self.instrumentation = None
+        self.pool.release(self)
+
+    def close_for_real(self):
+        super().close()
+
+class SQLiteConnectionPool:
+    # Long-lived, pre-tuned connections to one database file, reused by every
+    # TaskDatabase and thread in the process instead of reopening the file
+    # for each query.
+    def __init__(self, db_path: str, pool_size: int = 8, busy_timeout_ms: int = 5000,
+                 mmap_size: int = 256 * 1024 * 1024, cache_size_kib: int = 16 * 1024):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> PooledSQLiteConnection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,  # the pool makes sure one thread uses it at a time
+            factory=PooledSQLiteConnection
+        )
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers run alongside a writer; NORMAL is durable under WAL
+        # except for the last commits on power loss
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.pool = self
+        return conn
+
+    def acquire(self) -> PooledSQLiteConnection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def release(self, conn: PooledSQLiteConnection):
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+        conn.close_for_real()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close_for_real()
+
+_sqlite_pools = {}
+_sqlite_pools_lock = threading.Lock()
+
+def get_sqlite_pool(db_path: str, **settings) -> SQLiteConnectionPool:
+    # One pool per database file per process; the first caller's settings win
+    key = os.path.abspath(db_path)
+    with _sqlite_pools_lock:
+        if key not in _sqlite_pools:
+            _sqlite_pools[key] = SQLiteConnectionPool(db_path, **settings)
+        return _sqlite_pools[key]
+
+def timestamp_param(value: Union[datetime, date, str]) -> str:
+    # Matches the 'YYYY-MM-DD HH:MM:SS' text that CURRENT_TIMESTAMP stores,
+    # so range comparisons on spun_at are plain string comparisons
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+def fts_query(text: str) -> str:
+    # Turns what a user typed into an FTS5 query: every word must appear,
+    # the last one may be unfinished, and quotes or operators are literal
+    words = [word.replace('"', '""') for word in text.split()]
+    if not words:
+        return ""
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+def secret_settings(section: str) -> Dict:
+    # Optional tuning sections in secrets.toml; missing file or section means defaults
+    if not STREAMLIT_AVAILABLE:
+        return {}
+    try:
+        if section in st.secrets:
+            return dict(st.secrets[section])
+    except Exception:
         pass
+    return {}
+
+def cached_query(method):
+    # Serves repeated reads with the same arguments from the query cache.
+    # The replica is synced first, so a sync that pulls in other processes'
+    # writes invalidates the cache before it is consulted.
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.replica is not None:
+            self.replica.maybe_sync(self)
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return self.query_cache.get_or_load(key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
+def invalidates_cache(method):
+    # Writes bump the data version once they are done, even if they fail midway
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.data_changed()
+    return wrapper
+
+def invalidates_queries(*names):
+    # For writes that only the named cached queries read, such as the reports
+    # table: the rest of the cache stays warm and the replica isn't resynced
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.query_cache.invalidate(*names)
+        return wrapper
+    return decorator
+
+# Databases whose schema was already checked by this process
+_initialized_databases = set()
+_initialized_lock = threading.Lock()
 
 class TaskDatabase:
-    def __init__(self, db_path: str = "task_spinner.db"):
+    def __init__(self, db_path: str = "task_spinner.db", turso_url: str = None,
+                 turso_token: str = None, replica_path: str = None, local_only: bool = False):
         self.db_path = db_path
         self.use_turso = False
         self.turso_url = None
         self.turso_token = None
+        self.turso_pool = None
+        self.turso_caller = None
+        self.replica = None
+        self.instrumentation = Instrumentation()
+        turso_secrets = {}
         
-        if STREAMLIT_AVAILABLE and REQUESTS_AVAILABLE:
+        if turso_url and REQUESTS_AVAILABLE:
+            # Explicit endpoint, e.g. a local HTTP stand-in for testing
+            turso_secrets = {"database_url": turso_url, "auth_token": turso_token or ""}
+            if replica_path:
+                turso_secrets["replica_path"] = replica_path
+        elif STREAMLIT_AVAILABLE and REQUESTS_AVAILABLE and not local_only:
             try:
                 # Check secrets first
                 if "turso" in st.secrets:
-                    self.turso_url = st.secrets["turso"]["database_url"]
-                    self.turso_token = st.secrets["turso"]["auth_token"]
-                    self.use_turso = True
-                    print("✅ Connected to Turso database (HTTP Mode)")
+                    turso_secrets = st.secrets["turso"]
             except Exception as e:
                 print(f"⚠️  Turso secrets not found, using local SQLite: {e}")
         
+        if turso_secrets:
+            self.turso_url = turso_secrets["database_url"]
+            self.turso_token = turso_secrets["auth_token"]
+            self.turso_pool = get_session_pool(
+                pool_size=int(turso_secrets.get("pool_size", 10)),
+                connect_timeout=float(turso_secrets.get("connect_timeout", 5.0)),
+                read_timeout=float(turso_secrets.get("read_timeout", 30.0)),
+                idle_timeout=float(turso_secrets.get("pool_idle_timeout", 60.0))
+            )
+            self.turso_caller = get_resilient_caller(
+                self.turso_url,
+                retry=RetryPolicy(
+                    max_attempts=int(turso_secrets.get("max_attempts", 3)),
+                    base_delay=float(turso_secrets.get("retry_base_delay", 0.1))
+                ),
+                breaker=CircuitBreaker(
+                    failure_threshold=int(turso_secrets.get("breaker_failure_threshold", 5)),
+                    reset_timeout=float(turso_secrets.get("breaker_reset_timeout", 30.0))
+                ),
+                hedge_reads=bool(turso_secrets.get("hedge_reads", False)),
+                hedge_percentile=float(turso_secrets.get("hedge_percentile", 95.0))
+            )
+            self.use_turso = True
+            print("✅ Connected to Turso database (HTTP Mode)")
+        
         if not self.use_turso:
             print(f"📁 Using local SQLite database: {db_path}")
+            sqlite_settings = {k: int(v) for k, v in secret_settings("sqlite").items()}
+            self.sqlite_pool = get_sqlite_pool(db_path, **sqlite_settings)
         
-        self.init_database()
+        database_key = self.turso_url if self.use_turso else os.path.abspath(db_path)
+        cache_settings = secret_settings("cache")
+        self.query_cache = get_query_cache(
+            database_key,
+            max_entries=int(cache_settings.get("max_entries", 256)),
+            ttl_seconds=float(cache_settings.get("ttl_seconds", 300.0))
+        )
+        report_settings = secret_settings("reports")
+        self.report_cache = get_report_cache(
+            database_key,
+            max_entries=int(report_settings.get("cache_entries", 64)),
+            path=report_settings.get("cache_path")
+        )
+        
+        # Each process checks the schema once, not once per TaskDatabase
+        archive_settings = secret_settings("archive")
+        archive_now = False
+        with _initialized_lock:
+            # A failed migration is retried by the next TaskDatabase
+            if database_key not in _initialized_databases and self.init_database():
+                _initialized_databases.add(database_key)
+                archive_now = archive_settings.get("auto", False) and not local_only
+        
+        # Only the TaskDatabase that migrated archives, and outside the lock
+        # so other sessions aren't held up by a long first archive
+        if archive_now:
+            try:
+                moved = self.archive_spins(int(archive_settings.get("horizon_days", 365)))
+                if moved:
+                    print(f"Archived {moved} spins older than {archive_settings.get('horizon_days', 365)} days")
+            except Exception as e:
+                print(f"Archiving old spins failed: {e}")
+        
+        if self.use_turso and turso_secrets.get("replica_path"):
+            # Reads come from a local copy; the replica runs the same migrations
+            local_db = TaskDatabase(turso_secrets["replica_path"], local_only=True)
+            self.replica = get_replica(
+                local_db,
+                sync_interval=float(turso_secrets.get("replica_sync_interval", 30.0))
+            )
+            print(f"📁 Serving reads from embedded replica: {turso_secrets['replica_path']}")
+    
+    def cache_stats(self) -> Dict:
+        return self.query_cache.stats()
+    
+    def data_changed(self):
+        self.query_cache.bump_version()
+        if self.replica is not None:
+            self.replica.mark_dirty()
+    
+    @contextmanager
+    def transaction(self):
+        # Yields a connection whose statements commit together, or not at all
+        conn = self.get_connection()
+        if self.use_turso:
+            conn.begin()
+        else:
+            conn.execute("BEGIN")
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+            self.data_changed()
+    
+    def get_read_connection(self):
+        # Reads go to the embedded replica when there is one, after pulling
+        # in whatever changed since the last sync. If that sync fails they
+        # go to the primary instead of a copy that may be stale.
+        if self.replica is not None and self.replica.maybe_sync(self):
+            conn = self.replica.get_connection()
+            conn.instrumentation = self.instrumentation
+            return conn
+        return self.get_connection()
     
     def get_connection(self):
         if self.use_turso:
-            return TursoHTTPConnection(self.turso_url, self.turso_token)
+            return TursoHTTPConnection(self.turso_url, self.turso_token, self.turso_pool,
+                                       self.turso_caller, self.instrumentation)
         else:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self.sqlite_pool.acquire()
+            conn.instrumentation = self.instrumentation
             return conn
     
-    def init_database(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Check if tables exist
-        # SQLite: SELECT name FROM sqlite_master WHERE type='table' AND name='tasks';
-        # Turso: same
-        
+    def init_database(self) -> bool:
+        # Returns whether the schema is now up to date
         try:
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='tasks'")
-            if not cursor.fetchone():
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS tasks (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        task_name TEXT NOT NULL,
-                        category TEXT DEFAULT 'General',
-                        priority INTEGER DEFAULT 1,
-                        active INTEGER DEFAULT 1,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='spin_history'")
-            if not cursor.fetchone():
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS spin_history (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        task_id INTEGER NOT NULL,
-                        spun_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        completed INTEGER DEFAULT 0,
-                        notes TEXT,
-                        FOREIGN KEY (task_id) REFERENCES tasks (id)
-                    )
-                """)
-            conn.commit()
+            apply_migrations(self)
+            return True
         except Exception as e:
             print(f"Init DB Error: {e}")
-            
-        conn.close()
+            return False
     
+    @invalidates_cache
     def add_task(self, task_name: str, category: str = "General", priority: int = 1) -> int:
         try:
             conn = self.get_connection()
@@ -283,8 +838,61 @@ class TaskDatabase:
             raise e
 
     
+    def _write_in_chunks(self, sql: str, rows, batch_size: int, conn=None) -> int:
+        # Local mode uses executemany per chunk; Turso sends each chunk as one
+        # pipeline request. All chunks share a single transaction: conn's, if
+        # the caller already opened one with transaction(), or a new one.
+        if conn is None:
+            with self.transaction() as conn:
+                return self._write_in_chunks(sql, rows, batch_size, conn)
+        
+        written = 0
+        cursor = conn.cursor()
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= batch_size:
+                cursor.executemany(sql, chunk)
+                written += len(chunk)
+                chunk = []
+        if chunk:
+            cursor.executemany(sql, chunk)
+            written += len(chunk)
+        return written
+    
+    def add_tasks_bulk(self, tasks, batch_size: int = 500, conn=None) -> int:
+        # tasks: iterable of dicts with task_name and optional category/priority.
+        # conn: an open transaction() connection to write in, if any
+        rows = (
+            (task['task_name'], task.get('category') or "General", int(task.get('priority') or 1))
+            for task in tasks
+        )
+        return self._write_in_chunks(
+            "INSERT INTO tasks (task_name, category, priority) VALUES (?, ?, ?)",
+            rows, batch_size, conn
+        )
+    
+    def record_spins_bulk(self, spins, batch_size: int = 500, conn=None) -> int:
+        # spins: iterable of dicts with task_id and optional spun_at/completed/notes.
+        # conn: an open transaction() connection to write in, if any
+        rows = (
+            (
+                int(spin['task_id']),
+                timestamp_param(spin['spun_at']) if spin.get('spun_at') else None,
+                1 if spin.get('completed') else 0,
+                spin.get('notes') or ""
+            )
+            for spin in spins
+        )
+        return self._write_in_chunks(
+            "INSERT INTO spin_history (task_id, spun_at, completed, notes) "
+            "VALUES (?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?)",
+            rows, batch_size, conn
+        )
+    
+    @cached_query
     def get_all_tasks(self, active_only: bool = True) -> List[Dict]:
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         cursor = conn.cursor()
         
         if active_only:
@@ -306,19 +914,17 @@ class TaskDatabase:
         conn.close()
         return tasks
     
+    @cached_query
     def get_task_by_id(self, task_id: int) -> Optional[Dict]:
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM tasks WHERE id = ?", (task_id,))
         row = cursor.fetchone()
         conn.close()
         return dict(row) if row else None
     
-    def update_task(self, task_id: int, task_name: str = None, 
-                   category: str = None, priority: int = None, active: bool = None):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+    def _task_update_statement(self, task_id: int, task_name: str = None, category: str = None,
+                               priority: int = None, active: bool = None) -> Optional[Tuple[str, tuple]]:
         updates = []
         params = []
         
@@ -335,14 +941,41 @@ class TaskDatabase:
             updates.append("active = ?")
             params.append(1 if active else 0)
         
-        if updates:
-            params.append(task_id)
-            query = f"UPDATE tasks SET {', '.join(updates)} WHERE id = ?"
-            cursor.execute(query, tuple(params))
-            conn.commit()
+        if not updates:
+            return None
+        params.append(task_id)
+        return f"UPDATE tasks SET {', '.join(updates)} WHERE id = ?", tuple(params)
+    
+    @invalidates_cache
+    def update_task(self, task_id: int, task_name: str = None, 
+                   category: str = None, priority: int = None, active: bool = None):
+        statement = self._task_update_statement(task_id, task_name, category, priority, active)
+        if statement is None:
+            return
         
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(*statement)
+        conn.commit()
         conn.close()
     
+    def update_tasks(self, changes: List[Dict]):
+        # Each change is a dict of update_task keyword arguments. All of them
+        # are applied in one transaction.
+        statements = [self._task_update_statement(**change) for change in changes]
+        statements = [s for s in statements if s is not None]
+        if not statements:
+            return
+        
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            if self.use_turso:
+                cursor.execute_many_statements(statements)
+            else:
+                for sql, params in statements:
+                    cursor.execute(sql, params)
+    
+    @invalidates_cache
     def delete_task(self, task_id: int):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -350,8 +983,9 @@ class TaskDatabase:
         conn.commit()
         conn.close()
     
+    @cached_query
     def get_task_count(self) -> int:
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) as count FROM tasks WHERE active = 1")
         row = cursor.fetchone()
@@ -366,6 +1000,7 @@ class TaskDatabase:
         conn.close()
         return count
     
+    @invalidates_cache
     def record_spin(self, task_id: int, notes: str = "") -> int:
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -392,41 +1027,198 @@ class TaskDatabase:
         conn.close()
         return spin_id
     
+    @invalidates_cache
     def mark_spin_completed(self, spin_id: int, completed: bool = True):
-        conn = self.get_connection()
+        # The spin may have been archived; only one of the two matches
+        self.execute_batch([
+            (f"UPDATE {table} SET completed = ? WHERE id = ?", (1 if completed else 0, spin_id))
+            for table in ("spin_history", "spin_history_archive")
+        ])
+    
+    def fetch_batch(self, statements: List[Tuple[str, tuple]]) -> List[List[Dict]]:
+        # Runs several statements together on the primary database and
+        # returns one list of rows per statement. Turso mode sends them in a
+        # single pipeline request.
+        return self._run_batch(self.get_connection(), statements)
+    
+    def read_batch(self, statements: List[Tuple[str, tuple]]) -> List[List[Dict]]:
+        # Same as fetch_batch, for reads: served by the embedded replica
+        # when there is one
+        return self._run_batch(self.get_read_connection(), statements)
+    
+    def _run_batch(self, conn, statements: List[Tuple[str, tuple]]) -> List[List[Dict]]:
         cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE spin_history SET completed = ? WHERE id = ?",
-            (1 if completed else 0, spin_id)
-        )
+        
+        if isinstance(conn, TursoHTTPConnection):
+            results = cursor.execute_many_statements(statements)
+        else:
+            results = []
+            for sql, params in statements:
+                cursor.execute(sql, params)
+                results.append([dict(row) for row in cursor.fetchall()])
+        
         conn.commit()
         conn.close()
+        return results
+    
+    @invalidates_cache
+    def execute_batch(self, statements: List[Tuple[str, tuple]]) -> List[List[Dict]]:
+        # Same as fetch_batch, for statements that write
+        return self.fetch_batch(statements)
+    
+    def complete_spin(self, spin_id: int, notes: str = ""):
+        statements = [("UPDATE spin_history SET completed = 1 WHERE id = ?", (spin_id,))]
+        if notes:
+            statements.append(("UPDATE spin_history SET notes = ? WHERE id = ?", (notes, spin_id)))
+        self.execute_batch(statements)
+    
+    @cached_query
+    def get_archive_boundary(self) -> Optional[str]:
+        # spun_at of the newest archived spin, or None if nothing is archived.
+        # Reads that start after it never need the archive.
+        conn = self.get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT MAX(spun_at) as archived_until FROM spin_history_archive")
+        row = cursor.fetchone()
+        conn.close()
+        if row is None:
+            return None
+        return row['archived_until'] if hasattr(row, 'keys') else row[0]
+    
+    def _touches_archive(self, since: Union[datetime, date, str] = None) -> bool:
+        boundary = self.get_archive_boundary()
+        return boundary is not None and (since is None or timestamp_param(since) <= boundary)
     
+    @cached_query
     def get_spin_history(self, limit: int = 100) -> List[Dict]:
-        conn = self.get_connection()
+        # The newest spins wherever they are: imports can put old-dated spins
+        # in the hot table after an archive run, so it isn't simply newer
+        table = "spin_history_all" if self._touches_archive() else "spin_history"
+        conn = self.get_read_connection()
         cursor = conn.cursor()
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT sh.*, t.task_name, t.category, t.priority
-            FROM spin_history sh
+            FROM {table} sh
             JOIN tasks t ON sh.task_id = t.id
-            ORDER BY sh.spun_at DESC
+            ORDER BY sh.spun_at DESC, sh.id DESC
             LIMIT ?
         """, (limit,))
-        
-        rows = cursor.fetchall()
-        history = [dict(row) for row in rows]
+        history = [dict(row) for row in cursor.fetchall()]
         conn.close()
         return history
     
+    def search_history(self, query: str = "", filters: Dict = None, page: int = 1,
+                       page_size: int = 25) -> Dict:
+        # Spins whose notes or task name match query, newest first, one page
+        # at a time. filters may hold completed (bool), category, since and
+        # until. Matching runs in the database against spin_search, so only
+        # the requested page comes back.
+        filters = tuple(sorted((filters or {}).items()))
+        return self._search_history(query.strip(), filters, max(page, 1), page_size)
+    
+    @cached_query
+    def _search_history(self, query: str, filters: tuple, page: int, page_size: int) -> Dict:
+        options = dict(filters)
+        since = options.get('since')
+        table = "spin_history_all" if self._touches_archive(since) else "spin_history"
+        
+        joins = []
+        conditions = []
+        params = []
+        match = fts_query(query)
+        if match:
+            joins.append("JOIN spin_search s ON s.rowid = sh.id")
+            conditions.append("spin_search MATCH ?")
+            params.append(match)
+        if options.get('completed') is not None:
+            conditions.append("sh.completed = ?")
+            params.append(1 if options['completed'] else 0)
+        if options.get('category'):
+            conditions.append("t.category = ?")
+            params.append(options['category'])
+        if since is not None:
+            conditions.append("sh.spun_at >= ?")
+            params.append(timestamp_param(since))
+        if options.get('until') is not None:
+            conditions.append("sh.spun_at < ?")
+            params.append(timestamp_param(options['until']))
+        
+        # One extra row tells whether another page follows
+        query_sql = f"""
+            SELECT sh.*, t.task_name, t.category, t.priority
+            FROM {table} sh
+            JOIN tasks t ON sh.task_id = t.id
+            {' '.join(joins)}
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+            ORDER BY sh.spun_at DESC, sh.id DESC
+            LIMIT ? OFFSET ?
+        """
+        conn = self.get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute(query_sql, (*params, page_size + 1, (page - 1) * page_size))
+        rows = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return {"rows": rows[:page_size], "page": page, "has_more": len(rows) > page_size}
+    
+    def iter_spin_history(self, since: Union[datetime, date, str] = None,
+                          until: Union[datetime, date, str] = None, page_size: int = 1000):
+        # Yields spins (joined with their task) oldest first, from since
+        # (inclusive) to until (exclusive). Pages use keyset pagination on
+        # (spun_at, id), so memory stays bounded however long the history is
+        # and every page is an index range scan. Ranges reaching back into
+        # the archive merge it with the hot table in order.
+        hot = self._iter_spins("spin_history", since, until, page_size)
+        if not self._touches_archive(since):
+            return hot
+        cold = self._iter_spins("spin_history_archive", since, until, page_size)
+        return heapq.merge(cold, hot, key=lambda spin: (spin['spun_at'], spin['id']))
+    
+    def _iter_spins(self, table: str, since: Union[datetime, date, str] = None,
+                    until: Union[datetime, date, str] = None, page_size: int = 1000):
+        conditions = ["(sh.spun_at, sh.id) > (?, ?)"]
+        bounds = []
+        if since is not None:
+            conditions.append("sh.spun_at >= ?")
+            bounds.append(timestamp_param(since))
+        if until is not None:
+            conditions.append("sh.spun_at < ?")
+            bounds.append(timestamp_param(until))
+        
+        query = f"""
+            SELECT sh.*, t.task_name, t.category, t.priority
+            FROM {table} sh
+            JOIN tasks t ON sh.task_id = t.id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY sh.spun_at, sh.id
+            LIMIT ?
+        """
+        
+        after = ("", 0)
+        while True:
+            # The connection goes back to the pool between pages
+            conn = self.get_read_connection()
+            cursor = conn.cursor()
+            cursor.execute(query, (*after, *bounds, page_size))
+            page = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+            
+            yield from page
+            if len(page) < page_size:
+                return
+            after = (page[-1]['spun_at'], page[-1]['id'])
+    
+    @cached_query
     def get_analytics_data(self, days: int = 30) -> pd.DataFrame:
-        conn = self.get_connection()
         cutoff_date = datetime.now() - timedelta(days=days)
+        table = "spin_history_all" if self._touches_archive(cutoff_date) else "spin_history"
+        conn = self.get_read_connection()
         
         # For HTTP client, we need to adapt since pandas read_sql_query expects a real sqlalchemy or DBAPI connection
-        # TursoHTTPConnection is NOT fully DBAPI compliant.
-        # So we should manually fetch and create DataFrame if using Turso.
+        # TursoHTTPConnection is NOT fully DBAPI compliant, so the cursor
+        # decodes the response column by column into the DataFrame instead.
+        # Both paths return spun_at as datetime64 and names as categoricals.
         
-        query = """
+        query = f"""
             SELECT 
                 sh.spun_at,
                 sh.completed,
@@ -434,35 +1226,308 @@ class TaskDatabase:
                 t.category,
                 t.priority,
                 DATE(sh.spun_at) as spin_date
-            FROM spin_history sh
+            FROM {table} sh
             JOIN tasks t ON sh.task_id = t.id
             WHERE sh.spun_at >= ?
             ORDER BY sh.spun_at
         """
         
-        if self.use_turso:
+        if isinstance(conn, TursoHTTPConnection):
             cursor = conn.cursor()
             cursor.execute(query, (str(cutoff_date),)) # Ensure string for date
-            rows = cursor.fetchall()
-            # Convert list of dicts/rows to DF
-            if not rows:
-                df = pd.DataFrame(columns=['spun_at', 'completed', 'task_name', 'category', 'priority', 'spin_date'])
-            else:
-                # rows are usually dicts from my cursor
-                df = pd.DataFrame([dict(r) for r in rows])
+            df = cursor.fetch_dataframe(parse_dates=['spun_at'], categories=['task_name', 'category'])
         else:
-            df = pd.read_sql_query(query, conn, params=(cutoff_date,))
+            df = pd.read_sql_query(query, conn, params=(cutoff_date,), parse_dates=['spun_at'])
+            df[['task_name', 'category']] = df[['task_name', 'category']].astype('category')
             
         conn.close()
         return df
     
-    def get_task_frequency(self) -> List[Tuple[str, int]]:
+    @cached_query
+    def get_daily_rollup(self, since: Union[datetime, date, str] = None,
+                         until: Union[datetime, date, str] = None) -> pd.DataFrame:
+        # Spin and completion counts per (date, hour, task) from
+        # spin_daily_rollup, for dates from since (inclusive) to until
+        # (exclusive). One row per busy hour, however many spins it held.
+        conn = self.get_read_connection()
+        conditions = ["r.spins > 0"]
+        params = []
+        if since is not None:
+            conditions.append("r.spin_date >= ?")
+            params.append(timestamp_param(since)[:10])
+        if until is not None:
+            conditions.append("r.spin_date < ?")
+            params.append(timestamp_param(until)[:10])
+        
+        query = f"""
+            SELECT r.spin_date, r.spin_hour, r.task_id, t.task_name, r.category,
+                   r.spins, r.completed
+            FROM spin_daily_rollup r
+            JOIN tasks t ON r.task_id = t.id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY r.spin_date, r.spin_hour
+        """
+        
+        if isinstance(conn, TursoHTTPConnection):
+            cursor = conn.cursor()
+            cursor.execute(query, tuple(params))
+            df = cursor.fetch_dataframe(parse_dates=['spin_date'], categories=['task_name', 'category'])
+        else:
+            df = pd.read_sql_query(query, conn, params=tuple(params), parse_dates=['spin_date'])
+            df[['task_name', 'category']] = df[['task_name', 'category']].astype('category')
+        
+        conn.close()
+        return df
+    
+    @cached_query
+    def get_data_version(self) -> str:
+        # Newest updated_at of any task or spin. The touch triggers advance it
+        # on every write, from any process, so it survives restarts. It is
+        # held SYNC_OVERLAP behind the clock: a transaction can commit a
+        # little after the updated_at it stamped, and period_changed_since
+        # then still sees its rows as newer than the version.
+        conn = self.get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT MIN(MAX(version), strftime('%Y-%m-%d %H:%M:%f', 'now', ?)) as version FROM (
+                SELECT MAX(updated_at) as version FROM tasks
+                UNION ALL SELECT MAX(updated_at) FROM spin_history
+                UNION ALL SELECT MAX(updated_at) FROM spin_history_archive
+            )
+        """, (f"-{SYNC_OVERLAP.total_seconds():g} seconds",))
+        row = cursor.fetchone()
+        conn.close()
+        version = row['version'] if hasattr(row, 'keys') else row[0]
+        return version or ""
+    
+    @cached_query
+    def period_changed_since(self, version: str, start: Union[datetime, date, str],
+                             end: Union[datetime, date, str]) -> bool:
+        # Whether anything a report on [start, end) reads was written after
+        # version: a spin in the period or any task. Only rows newer than
+        # version are visited, through the updated_at indexes; the unary +
+        # keeps the planner off the spun_at index, which would scan the
+        # whole period.
+        bounds = (version, timestamp_param(start), timestamp_param(end))
+        conn = self.get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT EXISTS (SELECT 1 FROM tasks WHERE updated_at > ?)
+                OR EXISTS (SELECT 1 FROM spin_history WHERE updated_at > ? AND +spun_at >= ? AND +spun_at < ?)
+                OR EXISTS (SELECT 1 FROM spin_history_archive WHERE updated_at > ? AND +spun_at >= ? AND +spun_at < ?)
+                as changed
+        """, (version, *bounds, *bounds))
+        row = cursor.fetchone()
+        conn.close()
+        return bool(row['changed'] if hasattr(row, 'keys') else row[0])
+    
+    @cached_query
+    def get_spins_frame(self, start: Union[datetime, date, str],
+                        end: Union[datetime, date, str]) -> pd.DataFrame:
+        # Every spin from start (inclusive) to end (exclusive), oldest first,
+        # joined with its task, as one typed DataFrame: spun_at as
+        # datetime64, task_name and category as categoricals and completed
+        # as bool, decoded column by column without per-row dicts
+        table = "spin_history_all" if self._touches_archive(start) else "spin_history"
+        query = f"""
+            SELECT sh.id, sh.spun_at, sh.task_id, t.task_name, t.category, sh.completed, sh.notes
+            FROM {table} sh
+            JOIN tasks t ON sh.task_id = t.id
+            WHERE sh.spun_at >= ? AND sh.spun_at < ?
+            ORDER BY sh.spun_at, sh.id
+        """
+        params = (timestamp_param(start), timestamp_param(end))
+        conn = self.get_read_connection()
+        
+        if isinstance(conn, TursoHTTPConnection):
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            df = cursor.fetch_dataframe(parse_dates=['spun_at'], categories=['task_name', 'category'])
+        else:
+            df = pd.read_sql_query(query, conn, params=params, parse_dates=['spun_at'])
+            df[['task_name', 'category']] = df[['task_name', 'category']].astype('category')
+        
+        conn.close()
+        df['spun_at'] = df['spun_at'].astype('datetime64[ns]')
+        df['completed'] = df['completed'].fillna(0).astype(bool)
+        return df
+    
+    @cached_query
+    def get_report_aggregates(self, start: Union[datetime, date, str],
+                              end: Union[datetime, date, str]) -> Dict:
+        # Totals and per-task, per-category, per-weekday and per-week counts
+        # for the dates from start (inclusive) to end (exclusive). Each is a
+        # GROUP BY over spin_daily_rollup, so the cost depends on the number
+        # of days in the range rather than the number of spins. Weeks are
+        # numbered in 7-day blocks from start; weekdays are 0 = Sunday as in
+        # strftime('%w'). Turso mode sends all five in one request.
+        bounds = (timestamp_param(start)[:10], timestamp_param(end)[:10])
+        in_range = "r.spin_date >= ? AND r.spin_date < ? AND r.spins > 0"
+        statements = [
+            (f"""
+                SELECT COALESCE(SUM(r.spins), 0) as spins, COALESCE(SUM(r.completed), 0) as completed,
+                       COUNT(DISTINCT r.spin_date) as active_days
+                FROM spin_daily_rollup r
+                WHERE {in_range}
+            """, bounds),
+            (f"""
+                SELECT t.task_name, SUM(r.spins) as spins, SUM(r.completed) as completed
+                FROM spin_daily_rollup r
+                JOIN tasks t ON r.task_id = t.id
+                WHERE {in_range}
+                GROUP BY t.task_name
+                ORDER BY spins DESC, t.task_name
+            """, bounds),
+            (f"""
+                SELECT r.category, SUM(r.spins) as spins, SUM(r.completed) as completed
+                FROM spin_daily_rollup r
+                WHERE {in_range}
+                GROUP BY r.category
+                ORDER BY spins DESC, r.category
+            """, bounds),
+            (f"""
+                SELECT CAST(strftime('%w', r.spin_date) AS INTEGER) as weekday, SUM(r.spins) as spins
+                FROM spin_daily_rollup r
+                WHERE {in_range}
+                GROUP BY 1
+                ORDER BY 1
+            """, bounds),
+            (f"""
+                SELECT CAST((julianday(r.spin_date) - julianday(?)) / 7 AS INTEGER) + 1 as week,
+                       SUM(r.spins) as spins
+                FROM spin_daily_rollup r
+                WHERE {in_range}
+                GROUP BY 1
+                ORDER BY 1
+            """, (bounds[0], *bounds)),
+        ]
+        totals, by_task, by_category, by_weekday, by_week = self.read_batch(statements)
+        return {
+            "totals": totals[0],
+            "by_task": by_task,
+            "by_category": by_category,
+            "by_weekday": by_weekday,
+            "by_week": by_week
+        }
+    
+    @invalidates_queries("get_saved_report", "list_saved_reports")
+    def save_report(self, report_type: str, start: Union[date, str], end: Union[date, str],
+                    content: str, aggregates: Dict, data_version: str):
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute("""
-            SELECT t.task_name, COUNT(sh.id) as spin_count
+            INSERT INTO reports (report_type, period_start, period_end, content, aggregates, data_version)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (report_type, period_start) DO UPDATE SET
+                period_end = excluded.period_end,
+                content = excluded.content,
+                aggregates = excluded.aggregates,
+                data_version = excluded.data_version,
+                generated_at = CURRENT_TIMESTAMP
+        """, (report_type, timestamp_param(start), timestamp_param(end), content,
+              json.dumps(aggregates, default=str), data_version))
+        conn.commit()
+        conn.close()
+    
+    # Saved reports are read from the primary: the replica doesn't mirror them
+    @cached_query
+    def get_saved_report(self, report_type: str, start: Union[date, str]) -> Optional[Dict]:
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT * FROM reports WHERE report_type = ? AND period_start = ?",
+            (report_type, timestamp_param(start))
+        )
+        row = cursor.fetchone()
+        conn.close()
+        if row is None:
+            return None
+        report = dict(row)
+        report['aggregates'] = json.loads(report['aggregates']) if report['aggregates'] else None
+        return report
+    
+    @cached_query
+    def list_saved_reports(self, report_type: str, limit: int = 24) -> List[Dict]:
+        # Newest periods first, without their content
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT report_type, period_start, period_end, generated_at
+            FROM reports
+            WHERE report_type = ?
+            ORDER BY period_start DESC
+            LIMIT ?
+        """, (report_type, limit))
+        reports = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return reports
+    
+    def rebuild_daily_rollup(self) -> int:
+        # Recomputes spin_daily_rollup from hot and archived spins, e.g. after
+        # rows were written with the triggers missing. Returns the number of
+        # rollup rows.
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            statements = [(sql, ()) for sql in rollup_backfill("spin_history_all")]
+            if self.use_turso:
+                cursor.execute_many_statements(statements)
+            else:
+                for sql, params in statements:
+                    cursor.execute(sql, params)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) as count FROM spin_daily_rollup")
+        row = cursor.fetchone()
+        conn.close()
+        return row['count'] if hasattr(row, 'keys') else row[0]
+    
+    def archive_spins(self, horizon_days: int = 365, batch_size: int = 5000) -> int:
+        # Moves spins older than horizon_days into spin_history_archive, one
+        # batch per transaction so writers are never blocked for long. The
+        # rollup keeps counting them and range reads still find them.
+        # Returns the number of spins moved.
+        cutoff = timestamp_param(datetime.now(timezone.utc) - timedelta(days=max(horizon_days, 7)))
+        
+        # Both statements pick the same oldest rows within one transaction;
+        # changes() then counts the rows the DELETE actually moved
+        oldest = "SELECT id FROM spin_history WHERE spun_at < ? ORDER BY spun_at, id LIMIT ?"
+        statements = [
+            (
+                "INSERT OR REPLACE INTO spin_history_archive "
+                "(id, task_id, spun_at, completed, notes, client_id, updated_at) "
+                f"SELECT id, task_id, spun_at, completed, notes, client_id, {NOW_MS} "
+                f"FROM spin_history WHERE id IN ({oldest})",
+                (cutoff, batch_size)
+            ),
+            (f"DELETE FROM spin_history WHERE id IN ({oldest})", (cutoff, batch_size)),
+            ("SELECT changes() as moved", ()),
+        ]
+        
+        moved = 0
+        while True:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                if self.use_turso:
+                    row = cursor.execute_many_statements(statements)[-1][0]
+                else:
+                    for sql, params in statements:
+                        cursor.execute(sql, params)
+                    row = cursor.fetchone()
+            batch = row['moved'] if hasattr(row, 'keys') else row[0]
+            moved += batch
+            # A short batch means nothing older than the cutoff is left
+            if batch < batch_size:
+                return moved
+    
+    @cached_query
+    def get_task_frequency(self) -> List[Tuple[str, int]]:
+        conn = self.get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT t.task_name, COALESCE(SUM(r.spins), 0) as spin_count
             FROM tasks t
-            LEFT JOIN spin_history sh ON t.id = sh.task_id
+            LEFT JOIN spin_daily_rollup r ON t.id = r.task_id
             WHERE t.active = 1
             GROUP BY t.id, t.task_name
             ORDER BY spin_count DESC
@@ -479,37 +1544,72 @@ class TaskDatabase:
                 output.append((row[0], row[1]))
         return output
     
+    @cached_query
     def get_completion_rate(self) -> float:
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         cursor = conn.cursor()
         
-        cursor.execute("SELECT COUNT(*) as count FROM spin_history WHERE completed = 1")
-        row = cursor.fetchone()
-        if row is None:
-            completed = 0
-        else:
-            completed = row['count'] if isinstance(row, dict) else row[0]
-        
-        cursor.execute("SELECT COUNT(*) as count FROM spin_history")
+        # Both counts in one statement, so Turso mode pays a single round trip.
+        # All-time totals come from the rollup, which still counts archived spins.
+        cursor.execute("""
+            SELECT COALESCE(SUM(spins), 0) as total, COALESCE(SUM(completed), 0) as completed
+            FROM spin_daily_rollup
+        """)
         row = cursor.fetchone()
         if row is None:
-            total = 0
+            completed, total = 0, 0
         else:
-            total = row['count'] if isinstance(row, dict) else row[0]
+            total = row['total'] if hasattr(row, 'keys') else row[0]
+            completed = row['completed'] if hasattr(row, 'keys') else row[1]
         
         conn.close()
         return (completed / total * 100) if total > 0 else 0
     
+    @cached_query
+    def get_dashboard_snapshot(self) -> Dict:
+        conn = self.get_read_connection()
+        cursor = conn.cursor()
+        
+        # Everything the sidebar and statistics header show, in one aggregate
+        # round trip instead of fetching the history rows to count them.
+        # All-time figures come from the rollup; the last week is always hot.
+        cursor.execute("""
+            SELECT
+                (SELECT COALESCE(SUM(spins), 0) FROM spin_daily_rollup) as total_spins,
+                (SELECT COALESCE(SUM(completed), 0) FROM spin_daily_rollup) as completed_spins,
+                (SELECT COUNT(*) FROM tasks WHERE active = 1) as active_tasks,
+                (SELECT COUNT(*) FROM spin_history
+                 WHERE spun_at >= datetime('now', '-7 days')) as spins_last_7_days,
+                (SELECT t.task_name
+                 FROM spin_daily_rollup r
+                 JOIN tasks t ON r.task_id = t.id
+                 WHERE t.active = 1
+                 GROUP BY r.task_id
+                 HAVING SUM(r.spins) > 0
+                 ORDER BY SUM(r.spins) DESC
+                 LIMIT 1) as most_spun_task
+        """)
+        row = cursor.fetchone()
+        conn.close()
+        
+        snapshot = dict(row) if row else {}
+        for key in ('total_spins', 'completed_spins', 'active_tasks', 'spins_last_7_days'):
+            snapshot[key] = snapshot.get(key) or 0
+        total = snapshot['total_spins']
+        snapshot['completion_rate'] = (snapshot['completed_spins'] / total * 100) if total > 0 else 0
+        return snapshot
+    
+    @cached_query
     def get_category_stats(self) -> List[Dict]:
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         cursor = conn.cursor()
         cursor.execute("""
             SELECT 
                 t.category,
-                COUNT(sh.id) as total_spins,
-                SUM(sh.completed) as completed_spins
+                COALESCE(SUM(r.spins), 0) as total_spins,
+                SUM(r.completed) as completed_spins
             FROM tasks t
-            LEFT JOIN spin_history sh ON t.id = sh.task_id
+            LEFT JOIN spin_daily_rollup r ON t.id = r.task_id
             WHERE t.active = 1
             GROUP BY t.category
             ORDER BY total_spins DESC
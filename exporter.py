@@ -0,0 +1,149 @@
+import atexit
+import itertools
+import os
+import tempfile
+import threading
+import time
+import zlib
+from typing import Callable, Iterator, List
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# import_spins reads these back, so an export can be re-imported as is
+EXPORT_COLUMNS = ["id", "spun_at", "task_id", "task_name", "category", "completed", "notes"]
+
+# format -> (file suffix, mime type)
+EXPORT_FORMATS = {
+    "csv": (".csv", "text/csv"),
+    "csv.gz": (".csv.gz", "application/gzip"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+# Temp files from export_spins are removed after this long even if the
+# session that asked for them never comes back
+EXPORT_TTL_SECONDS = 3600
+
+# path -> time written, for every temp file export_spins created
+_temp_exports = {}
+_temp_exports_lock = threading.Lock()
+
+def available_formats() -> List[str]:
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or PYARROW_AVAILABLE]
+
+def iter_spin_chunks(db, start, end, chunk_size: int = 5000) -> Iterator[pd.DataFrame]:
+    # Spins from start (inclusive) to end (exclusive) as DataFrames of at
+    # most chunk_size rows, oldest first. Only one chunk is held at a time.
+    spins = db.iter_spin_history(since=start, until=end, page_size=chunk_size)
+    while True:
+        rows = list(itertools.islice(spins, chunk_size))
+        if not rows:
+            return
+        chunk = pd.DataFrame(rows, columns=EXPORT_COLUMNS)
+        chunk['completed'] = chunk['completed'].fillna(0).astype(bool)
+        yield chunk
+
+def iter_csv(chunks: Iterator[pd.DataFrame], compress: bool = False) -> Iterator[bytes]:
+    # CSV bytes one chunk at a time; with compress, a single gzip stream
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31 = gzip framing
+    header = True
+    for chunk in chunks:
+        data = chunk.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if header:
+        # Nothing in range: still a valid file with its header
+        data = (",".join(EXPORT_COLUMNS) + "\n").encode("utf-8")
+        yield compressor.compress(data) if compressor is not None else data
+    if compressor is not None:
+        yield compressor.flush()
+
+def _parquet_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("spun_at", pa.timestamp("s")),
+        ("task_id", pa.int64()),
+        ("task_name", pa.string()),
+        ("category", pa.string()),
+        ("completed", pa.bool_()),
+        ("notes", pa.string()),
+    ])
+
+def _reporting(chunks: Iterator[pd.DataFrame], progress: Callable[[int, int], None],
+               total: int) -> Iterator[pd.DataFrame]:
+    done = 0
+    progress(done, total)
+    for chunk in chunks:
+        yield chunk
+        done += len(chunk)
+        progress(done, total)
+
+def export_spins(db, start, end, fmt: str = "csv", path: str = None, chunk_size: int = 5000,
+                 progress: Callable[[int, int], None] = None) -> str:
+    # Streams the spins of a date range into a file and returns its path (a
+    # new temp file unless path is given). Memory stays at about one chunk
+    # whatever the range. progress, if given, is called with (spins written,
+    # expected total) after every chunk.
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == "parquet" and not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet export needs pyarrow")
+
+    temporary = path is None
+    if temporary:
+        fd, path = tempfile.mkstemp(prefix="spins_", suffix=EXPORT_FORMATS[fmt][0])
+        os.close(fd)
+
+    chunks = iter_spin_chunks(db, start, end, chunk_size)
+    if progress is not None:
+        # From the rollup, so counting doesn't cost a pass over the spins
+        total = int(db.get_report_aggregates(start, end)['totals']['spins'])
+        chunks = _reporting(chunks, progress, total)
+
+    try:
+        if fmt == "parquet":
+            schema = _parquet_schema()
+            with pq.ParquetWriter(path, schema) as writer:
+                for chunk in chunks:
+                    # Legacy spun_at values that aren't timestamps become null, as in get_spins_frame
+                    chunk['spun_at'] = pd.to_datetime(chunk['spun_at'], format="ISO8601", errors="coerce")
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        else:
+            with open(path, "wb") as f:
+                for data in iter_csv(chunks, compress=fmt == "csv.gz"):
+                    f.write(data)
+    except BaseException:
+        os.remove(path)
+        raise
+    if temporary:
+        with _temp_exports_lock:
+            _temp_exports[path] = time.time()
+    return path
+
+def remove_export(path: str):
+    with _temp_exports_lock:
+        _temp_exports.pop(path, None)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def sweep_exports(max_age_seconds: float = EXPORT_TTL_SECONDS) -> int:
+    # Removes temp exports older than max_age_seconds; returns how many
+    cutoff = time.time() - max_age_seconds
+    with _temp_exports_lock:
+        expired = [path for path, written in _temp_exports.items() if written < cutoff]
+    for path in expired:
+        remove_export(path)
+    return len(expired)
+
+atexit.register(sweep_exports, 0)
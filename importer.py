@@ -0,0 +1,131 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from database import timestamp_param
+
+TRUE_VALUES = ("1", "true", "yes", "y", "completed", "done")
+
+# Tried after ISO 8601; slashes are read month first
+SPUN_AT_FORMATS = ("%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%m/%d/%Y", "%d.%m.%Y %H:%M", "%d.%m.%Y")
+
+def _read_records(file, filename: str, section: str) -> List[Dict]:
+    # CSV files hold one kind of record; JSON files are either a list of
+    # records or an object with "tasks" and/or "spins" lists
+    if filename.lower().endswith(".json"):
+        data = json.load(file)
+        if isinstance(data, dict):
+            return data.get(section, [])
+        return data
+
+    if isinstance(file, io.TextIOBase):
+        text = file
+    else:
+        text = io.TextIOWrapper(file, encoding="utf-8-sig")
+    return list(csv.DictReader(text))
+
+def _parse_completed(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_VALUES
+    return bool(value)
+
+def _parse_task_id(value, known_ids: set) -> int:
+    # Raises ValueError unless value is the id of an existing task
+    try:
+        task_id = int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"task_id is not a number: {value}")
+    if task_id not in known_ids:
+        raise ValueError(f"no task with id {task_id}")
+    return task_id
+
+def _parse_spun_at(value) -> Optional[str]:
+    # Normalizes a timestamp to the stored 'YYYY-MM-DD HH:MM:SS' form, in
+    # UTC like CURRENT_TIMESTAMP. Raises ValueError if it can't be read.
+    text = str(value).strip()
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        for fmt in SPUN_AT_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"unreadable spun_at: {text}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp_param(parsed)
+
+def import_tasks(db, file, filename: str, batch_size: int = 500) -> int:
+    # Columns: task_name, category (optional), priority (optional)
+    records = _read_records(file, filename, "tasks")
+    tasks = (
+        {
+            "task_name": record["task_name"].strip(),
+            "category": (record.get("category") or "General").strip(),
+            "priority": int(record.get("priority") or 1)
+        }
+        for record in records
+        if (record.get("task_name") or "").strip()
+    )
+    return db.add_tasks_bulk(tasks, batch_size=batch_size)
+
+def import_spins(db, file, filename: str, batch_size: int = 500) -> Dict[str, int]:
+    # Columns: task_id or task_name, spun_at (optional), completed (optional),
+    # notes (optional). Task names that don't exist yet are created first, in
+    # the same transaction as the spins, so a failed import leaves nothing
+    # behind. Rows with a task_id that names no task, or a spun_at that can't
+    # be read, are rejected rather than stored as is.
+    records = _read_records(file, filename, "spins")
+
+    task_ids = {task['task_name']: task['id'] for task in db.get_all_tasks(active_only=False)}
+    known_ids = set(task_ids.values())
+    pending = []
+    rejected = 0
+    for record in records:
+        name = (record.get("task_name") or "").strip()
+        if not record.get("task_id") and not name:
+            continue
+        try:
+            task_id = _parse_task_id(record["task_id"], known_ids) if record.get("task_id") else None
+            spun_at = _parse_spun_at(record["spun_at"]) if record.get("spun_at") else None
+        except ValueError:
+            rejected += 1
+            continue
+        pending.append((task_id, name, {
+            "spun_at": spun_at,
+            "completed": _parse_completed(record.get("completed")),
+            "notes": record.get("notes") or ""
+        }))
+
+    missing = sorted({name for task_id, name, _ in pending if task_id is None} - set(task_ids))
+    with db.transaction() as conn:
+        created = 0
+        if missing:
+            created = db.add_tasks_bulk(({"task_name": name} for name in missing),
+                                        batch_size=batch_size, conn=conn)
+            cursor = conn.cursor()
+            for start in range(0, len(missing), batch_size):
+                names = missing[start:start + batch_size]
+                cursor.execute(
+                    f"SELECT id, task_name FROM tasks WHERE task_name IN ({', '.join('?' * len(names))})",
+                    tuple(names)
+                )
+                task_ids.update({row['task_name']: row['id'] for row in cursor.fetchall()})
+
+        spins = (
+            dict(spin, task_id=task_id if task_id is not None else task_ids[name])
+            for task_id, name, spin in pending
+        )
+        imported = db.record_spins_bulk(spins, batch_size=batch_size, conn=conn)
+
+    return {
+        "spins": imported,
+        "tasks_created": created,
+        "rejected": rejected,
+        "skipped": len(records) - imported - rejected
+    }
@@ -0,0 +1,181 @@
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+def statement_kind(sql: str) -> str:
+    words = sql.split(None, 1)
+    return words[0].upper() if words else ""
+
+def short_sql(sql: str, limit: int = 160) -> str:
+    sql = re.sub(r"\s+", " ", sql).strip()
+    return sql if len(sql) <= limit else sql[:limit - 3] + "..."
+
+class MetricTotals:
+    # Counters since the process started, across every session. These are
+    # what the Prometheus export reports.
+    def __init__(self):
+        self.statements = {}
+        self.sections = {}
+        self._lock = threading.Lock()
+
+    def add_statement(self, backend: str, kind: str, seconds: float = 0.0, round_trips: int = 0,
+                      rows: int = 0, request_bytes: int = 0, response_bytes: int = 0,
+                      errors: int = 0, count: int = 0):
+        with self._lock:
+            totals = self.statements.setdefault((backend, kind), {
+                "count": 0, "seconds": 0.0, "round_trips": 0, "rows": 0,
+                "request_bytes": 0, "response_bytes": 0, "errors": 0
+            })
+            totals["count"] += count
+            totals["seconds"] += seconds
+            totals["round_trips"] += round_trips
+            totals["rows"] += rows
+            totals["request_bytes"] += request_bytes
+            totals["response_bytes"] += response_bytes
+            totals["errors"] += errors
+
+    def add_section(self, name: str, seconds: float):
+        with self._lock:
+            totals = self.sections.setdefault(name, {"count": 0, "seconds": 0.0})
+            totals["count"] += 1
+            totals["seconds"] += seconds
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            statements = {key: dict(value) for key, value in self.statements.items()}
+            sections = {key: dict(value) for key, value in self.sections.items()}
+
+        counters = [
+            ("taskspinner_statements_total", "count", "Statements executed"),
+            ("taskspinner_statement_seconds_total", "seconds", "Wall time spent in statements"),
+            ("taskspinner_round_trips_total", "round_trips", "HTTP requests sent to Turso"),
+            ("taskspinner_rows_total", "rows", "Rows returned by statements"),
+            ("taskspinner_request_bytes_total", "request_bytes", "Bytes sent to the database"),
+            ("taskspinner_response_bytes_total", "response_bytes", "Bytes received from the database"),
+            ("taskspinner_statement_errors_total", "errors", "Statements that failed"),
+        ]
+        lines = []
+        for metric, field, help_text in counters:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for (backend, kind), totals in sorted(statements.items()):
+                lines.append(f'{metric}{{backend="{backend}",statement="{kind}"}} {totals[field]}')
+
+        for metric, field, help_text in [
+            ("taskspinner_section_runs_total", "count", "Page sections rendered"),
+            ("taskspinner_section_seconds_total", "seconds", "Wall time spent in page sections"),
+        ]:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, totals in sorted(sections.items()):
+                lines.append(f'{metric}{{section="{name}"}} {totals[field]}')
+        return "\n".join(lines) + "\n"
+
+PROCESS_TOTALS = MetricTotals()
+
+class Instrumentation:
+    # Per-session record of the current rerun: every statement with its wall
+    # time, round trips, rows and bytes, and the time spent in each named
+    # page section. Statements may be recorded from worker threads.
+    def __init__(self, max_statements: int = 500, totals: MetricTotals = PROCESS_TOTALS):
+        self.max_statements = max_statements
+        self.totals = totals
+        self._lock = threading.Lock()
+        self.start_rerun()
+
+    def start_rerun(self):
+        with self._lock:
+            self.rerun_started = time.time()
+            self._rerun_start = time.perf_counter()
+            self.statements = []
+            self.sections = {}
+            self.dropped = 0
+
+    def record_statement(self, backend: str, sql: str, seconds: float, round_trips: int = 0,
+                         rows: int = 0, request_bytes: int = 0, response_bytes: int = 0,
+                         statements: int = 1, error: str = None) -> Dict:
+        # Returns the record, so rows fetched later can be added to it
+        record = {
+            "backend": backend,
+            "kind": statement_kind(sql),
+            "sql": short_sql(sql),
+            "statements": statements,
+            "seconds": seconds,
+            "round_trips": round_trips,
+            "rows": rows,
+            "request_bytes": request_bytes,
+            "response_bytes": response_bytes,
+            "error": error
+        }
+        with self._lock:
+            if len(self.statements) < self.max_statements:
+                self.statements.append(record)
+            else:
+                self.dropped += 1
+        self.totals.add_statement(
+            backend, record["kind"], seconds, round_trips, rows, request_bytes, response_bytes,
+            errors=1 if error else 0, count=statements
+        )
+        return record
+
+    def add_rows(self, record: Dict, rows: int, seconds: float):
+        # SQLite steps through results while they are fetched
+        with self._lock:
+            record["rows"] += rows
+            record["seconds"] += seconds
+        self.totals.add_statement(record["backend"], record["kind"], seconds, rows=rows)
+
+    @contextmanager
+    def section(self, name: str):
+        # Sections with the same name add up within a rerun
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self.sections[name] = self.sections.get(name, 0.0) + seconds
+            self.totals.add_section(name, seconds)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            statements = list(self.statements)
+            sections = dict(self.sections)
+            dropped = self.dropped
+        return {
+            "rerun_seconds": time.perf_counter() - self._rerun_start,
+            "sections": sections,
+            "statements": len(statements) + dropped,
+            "statement_seconds": sum(s["seconds"] for s in statements),
+            "round_trips": sum(s["round_trips"] for s in statements),
+            "rows": sum(s["rows"] for s in statements),
+            "request_bytes": sum(s["request_bytes"] for s in statements),
+            "response_bytes": sum(s["response_bytes"] for s in statements),
+            "errors": sum(1 for s in statements if s["error"])
+        }
+
+    def slowest(self, limit: int = 10) -> List[Dict]:
+        with self._lock:
+            statements = list(self.statements)
+        return sorted(statements, key=lambda s: s["seconds"], reverse=True)[:limit]
+
+    def json_lines(self) -> str:
+        # One JSON object per section and per statement of the current rerun
+        with self._lock:
+            statements = list(self.statements)
+            sections = dict(self.sections)
+        lines = [
+            json.dumps({"type": "section", "rerun_started": self.rerun_started, "section": name, "seconds": seconds})
+            for name, seconds in sections.items()
+        ]
+        lines += [
+            json.dumps({"type": "statement", "rerun_started": self.rerun_started, **record})
+            for record in statements
+        ]
+        return "\n".join(lines) + "\n"
+
+    def prometheus_text(self) -> str:
+        return self.totals.prometheus_text()
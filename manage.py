@@ -0,0 +1,57 @@
+import argparse
+
+from database import TaskDatabase, secret_settings
+from scheduler import ReportScheduler, precompute_reports
+
+# Maintenance commands, run against the same database the app uses:
+#   python manage.py rebuild-rollup
+#   python manage.py archive --horizon-days 365
+#   python manage.py precompute-reports --lookback 12 [--watch]
+
+def rebuild_rollup(db: TaskDatabase, args):
+    rows = db.rebuild_daily_rollup()
+    print(f"Rebuilt spin_daily_rollup: {rows} rows")
+
+def archive(db: TaskDatabase, args):
+    moved = db.archive_spins(args.horizon_days, args.batch_size)
+    print(f"Archived {moved} spins older than {args.horizon_days} days")
+
+def precompute(db: TaskDatabase, args):
+    if args.watch:
+        # Standalone worker: runs until interrupted
+        scheduler = ReportScheduler(db, lookback=args.lookback, start=False)
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            scheduler.stop()
+        return
+    built = precompute_reports(db, lookback=args.lookback)
+    print(f"Precomputed {len(built)} reports")
+
+def main():
+    parser = argparse.ArgumentParser(description="Daily Task Spinner maintenance")
+    parser.add_argument("--db-path", default="task_spinner.db", help="local SQLite file (ignored with Turso)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("rebuild-rollup", help="recompute spin_daily_rollup from all spins")
+    archive_parser = commands.add_parser("archive", help="move old spins to spin_history_archive")
+    archive_parser.add_argument("--horizon-days", type=int,
+                                default=int(secret_settings("archive").get("horizon_days", 365)))
+    archive_parser.add_argument("--batch-size", type=int, default=5000)
+    precompute_parser = commands.add_parser("precompute-reports", help="store reports of closed periods")
+    precompute_parser.add_argument("--lookback", type=int,
+                                   default=int(secret_settings("reports").get("precompute_lookback", 1)),
+                                   help="closed periods of each type to keep stored")
+    precompute_parser.add_argument("--watch", action="store_true", help="keep running, again after every midnight")
+
+    args = parser.parse_args()
+    db = TaskDatabase(args.db_path)
+    handlers = {
+        "rebuild-rollup": rebuild_rollup,
+        "archive": archive,
+        "precompute-reports": precompute,
+    }
+    handlers[args.command](db, args)
+
+if __name__ == "__main__":
+    main()
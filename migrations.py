@@ -0,0 +1,369 @@
+from typing import Callable, List
+
+def add_column_if_missing(table: str, column: str, declaration: str) -> Callable:
+    # ALTER TABLE ADD COLUMN has no IF NOT EXISTS, so check the table first
+    def statements(db) -> List[str]:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT name FROM pragma_table_info('{table}')")
+        existing = [row['name'] if hasattr(row, 'keys') else row[0] for row in cursor.fetchall()]
+        conn.close()
+        if column in existing:
+            return []
+        return [f"ALTER TABLE {table} ADD COLUMN {column} {declaration}"]
+    return statements
+
+# Millisecond timestamps, so change watermarks rarely tie
+NOW_MS = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+def touch_triggers(table: str) -> List[str]:
+    # Keep updated_at current on every insert and update. Rows that arrive
+    # with updated_at already set (e.g. synced into a replica) keep it.
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_touch_insert
+        AFTER INSERT ON {table} WHEN NEW.updated_at IS NULL
+        BEGIN
+            UPDATE {table} SET updated_at = {NOW_MS} WHERE id = NEW.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_touch_update
+        AFTER UPDATE ON {table} WHEN NEW.updated_at IS OLD.updated_at
+        BEGIN
+            UPDATE {table} SET updated_at = {NOW_MS} WHERE id = NEW.id;
+        END
+        """
+    ]
+
+# Rollup key for a spin_history row; category is the task's current one
+def rollup_key(row: str) -> str:
+    return (
+        f"date({row}.spun_at), CAST(strftime('%H', {row}.spun_at) AS INTEGER), {row}.task_id, "
+        f"COALESCE((SELECT category FROM tasks WHERE id = {row}.task_id), 'General')"
+    )
+
+def rollup_backfill(source: str = "spin_history") -> List[str]:
+    # Recomputes spin_daily_rollup from every spin in source
+    return [
+        "DELETE FROM spin_daily_rollup",
+        f"""
+        INSERT INTO spin_daily_rollup (spin_date, spin_hour, task_id, category, spins, completed)
+        SELECT date(sh.spun_at), CAST(strftime('%H', sh.spun_at) AS INTEGER), sh.task_id,
+               COALESCE(t.category, 'General'), COUNT(*), COALESCE(SUM(sh.completed = 1), 0)
+        FROM {source} sh
+        LEFT JOIN tasks t ON t.id = sh.task_id
+        WHERE date(sh.spun_at) IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        """
+    ]
+
+# Counts NEW into spin_daily_rollup. Rows whose spun_at isn't a timestamp
+# are left out, as in the backfill.
+ROLLUP_ADD_NEW = f"""
+            INSERT INTO spin_daily_rollup (spin_date, spin_hour, task_id, category, spins, completed)
+            SELECT {rollup_key('NEW')}, 1, COALESCE(NEW.completed, 0) = 1
+            WHERE date(NEW.spun_at) IS NOT NULL
+            ON CONFLICT (spin_date, spin_hour, task_id, category) DO UPDATE SET
+                spins = spins + 1,
+                completed = completed + excluded.completed;"""
+
+def rollup_update_trigger(table: str) -> str:
+    # Moves an edited spin's count from its old rollup row to its new one
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_rollup_update
+        AFTER UPDATE OF spun_at, task_id, completed ON {table}
+        WHEN OLD.spun_at IS NOT NEW.spun_at OR OLD.task_id IS NOT NEW.task_id
+             OR OLD.completed IS NOT NEW.completed
+        BEGIN
+            UPDATE spin_daily_rollup
+            SET spins = spins - 1, completed = completed - (COALESCE(OLD.completed, 0) = 1)
+            WHERE spin_date = date(OLD.spun_at)
+              AND spin_hour = CAST(strftime('%H', OLD.spun_at) AS INTEGER)
+              AND task_id = OLD.task_id;{ROLLUP_ADD_NEW}
+        END
+        """
+
+def rollup_triggers() -> List[str]:
+    # Keep spin_daily_rollup in step with spin_history. There is no delete
+    # trigger: spins leaving spin_history are still counted.
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_spin_history_rollup_insert
+        AFTER INSERT ON spin_history
+        BEGIN{ROLLUP_ADD_NEW}
+        END
+        """,
+        rollup_update_trigger("spin_history"),
+        # A task's rollup rows follow it when its category changes
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_rollup_category
+        AFTER UPDATE OF category ON tasks WHEN OLD.category IS NOT NEW.category
+        BEGIN
+            UPDATE spin_daily_rollup SET category = COALESCE(NEW.category, 'General') WHERE task_id = NEW.id;
+        END
+        """,
+        # Replica sync can deliver spins before the task they belong to
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_rollup_insert
+        AFTER INSERT ON tasks
+        BEGIN
+            UPDATE spin_daily_rollup SET category = COALESCE(NEW.category, 'General') WHERE task_id = NEW.id;
+        END
+        """
+    ]
+
+def search_triggers(table: str, other: str) -> List[str]:
+    # Keep spin_search in step with a spin table. A spin moving between
+    # spin_history and the archive keeps its entry: the copy is inserted
+    # before the original is deleted. Entries are deleted and re-inserted
+    # rather than INSERT OR REPLACE'd: an outer upsert (replica sync) would
+    # override the OR REPLACE and fail on the existing rowid.
+    index_new = """
+            DELETE FROM spin_search WHERE rowid = NEW.id;
+            INSERT INTO spin_search (rowid, task_name, notes)
+            VALUES (NEW.id, (SELECT task_name FROM tasks WHERE id = NEW.task_id), COALESCE(NEW.notes, ''));"""
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_search_insert
+        AFTER INSERT ON {table}
+        BEGIN{index_new}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_search_update
+        AFTER UPDATE OF notes, task_id ON {table}
+        BEGIN{index_new}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_search_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM spin_search
+            WHERE rowid = OLD.id AND NOT EXISTS (SELECT 1 FROM {other} WHERE id = OLD.id);
+        END
+        """
+    ]
+
+def task_name_search_triggers() -> List[str]:
+    # Renames reach every spin of the task. Replica sync can deliver spins
+    # before their task, so inserts fill the name in too.
+    refresh = """
+            UPDATE spin_search SET task_name = NEW.task_name
+            WHERE rowid IN (SELECT id FROM spin_history_all WHERE task_id = NEW.id);"""
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_search_rename
+        AFTER UPDATE OF task_name ON tasks WHEN OLD.task_name IS NOT NEW.task_name
+        BEGIN{refresh}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_search_insert
+        AFTER INSERT ON tasks
+        BEGIN{refresh}
+        END
+        """
+    ]
+
+def archive_rollup_triggers() -> List[str]:
+    # A spin moved into the archive was counted while it was hot. One that
+    # arrives without its hot copy (e.g. a fresh replica syncing the
+    # archive) is counted on arrival.
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_spin_history_archive_rollup_insert
+        AFTER INSERT ON spin_history_archive
+        WHEN NOT EXISTS (SELECT 1 FROM spin_history WHERE id = NEW.id)
+        BEGIN{ROLLUP_ADD_NEW}
+        END
+        """
+    ]
+
+# Ordered schema migrations as (version, description, steps). Each version
+# is applied once per database and recorded in schema_version. Steps are SQL
+# strings, or callables that take the database and return SQL strings. They
+# are idempotent, so a migration interrupted halfway can simply be applied
+# again.
+MIGRATIONS = [
+    (1, "create tasks and spin_history", [
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_name TEXT NOT NULL,
+            category TEXT DEFAULT 'General',
+            priority INTEGER DEFAULT 1,
+            active INTEGER DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS spin_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER NOT NULL,
+            spun_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed INTEGER DEFAULT 0,
+            notes TEXT,
+            FOREIGN KEY (task_id) REFERENCES tasks (id)
+        )
+        """
+    ]),
+    (2, "index spin_history and tasks for analytics", [
+        # Date-range scans read everything they need from the index
+        "CREATE INDEX IF NOT EXISTS idx_spin_history_spun_at ON spin_history (spun_at, task_id, completed)",
+        # Per-task counts and completion sums
+        "CREATE INDEX IF NOT EXISTS idx_spin_history_task_completed ON spin_history (task_id, completed)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_active_category ON tasks (active, category)"
+    ]),
+    (3, "track updated_at for incremental replica sync", [
+        add_column_if_missing("tasks", "updated_at", "TIMESTAMP"),
+        add_column_if_missing("spin_history", "updated_at", "TIMESTAMP"),
+        "UPDATE tasks SET updated_at = created_at WHERE updated_at IS NULL",
+        "UPDATE spin_history SET updated_at = spun_at WHERE updated_at IS NULL",
+        *touch_triggers("tasks"),
+        *touch_triggers("spin_history"),
+        "CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON tasks (updated_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_spin_history_updated_at ON spin_history (updated_at, id)"
+    ]),
+    (4, "client-generated spin ids for write-behind replay", [
+        add_column_if_missing("spin_history", "client_id", "TEXT"),
+        # NULLs don't collide, so only queued spins are constrained
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_spin_history_client_id ON spin_history (client_id)"
+    ]),
+    (5, "daily rollup of spin counts for analytics and reports", [
+        """
+        CREATE TABLE IF NOT EXISTS spin_daily_rollup (
+            spin_date TEXT NOT NULL,
+            spin_hour INTEGER NOT NULL,
+            task_id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            spins INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (spin_date, spin_hour, task_id, category)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_spin_daily_rollup_task ON spin_daily_rollup (task_id)",
+        *rollup_backfill(),
+        *rollup_triggers()
+    ]),
+    (6, "cold archive for old spins", [
+        # Same columns as spin_history; rows are moved here by archive_spins()
+        """
+        CREATE TABLE IF NOT EXISTS spin_history_archive (
+            id INTEGER PRIMARY KEY,
+            task_id INTEGER NOT NULL,
+            spun_at TIMESTAMP,
+            completed INTEGER DEFAULT 0,
+            notes TEXT,
+            updated_at TIMESTAMP,
+            client_id TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_spin_history_archive_spun_at ON spin_history_archive (spun_at, task_id, completed)",
+        "CREATE INDEX IF NOT EXISTS idx_spin_history_archive_updated_at ON spin_history_archive (updated_at, id)",
+        # As idx_spin_history_task_completed; the task search triggers look
+        # spins up by task_id
+        "CREATE INDEX IF NOT EXISTS idx_spin_history_archive_task ON spin_history_archive (task_id, completed)",
+        """
+        CREATE VIEW IF NOT EXISTS spin_history_all AS
+        SELECT id, task_id, spun_at, completed, notes, updated_at, client_id FROM spin_history
+        UNION ALL
+        SELECT id, task_id, spun_at, completed, notes, updated_at, client_id FROM spin_history_archive
+        """,
+        # Archived spins can still be completed: edits reach the rollup, and
+        # replicas through updated_at
+        *archive_rollup_triggers(),
+        rollup_update_trigger("spin_history_archive"),
+        *touch_triggers("spin_history_archive")
+    ]),
+    (7, "full-text search over spin notes and task names", [
+        # rowid is the spin id; the task name is copied in so one MATCH
+        # covers both
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS spin_search USING fts5(
+            task_name, notes, tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """,
+        "DELETE FROM spin_search",
+        """
+        INSERT INTO spin_search (rowid, task_name, notes)
+        SELECT sh.id, t.task_name, COALESCE(sh.notes, '')
+        FROM spin_history_all sh
+        LEFT JOIN tasks t ON t.id = sh.task_id
+        """,
+        *search_triggers("spin_history", "spin_history_archive"),
+        *search_triggers("spin_history_archive", "spin_history"),
+        *task_name_search_triggers()
+    ]),
+    (8, "precomputed reports for closed periods", [
+        # One row per (report type, period); aggregates are the JSON of
+        # get_report_aggregates and data_version what they were built from
+        """
+        CREATE TABLE IF NOT EXISTS reports (
+            report_type TEXT NOT NULL,
+            period_start TEXT NOT NULL,
+            period_end TEXT NOT NULL,
+            content TEXT NOT NULL,
+            aggregates TEXT,
+            data_version TEXT,
+            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (report_type, period_start)
+        )
+        """
+    ]),
+]
+
+SCHEMA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+def get_schema_version(db) -> int:
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.execute(SCHEMA_VERSION_TABLE)
+    cursor.execute("SELECT COALESCE(MAX(version), 0) as version FROM schema_version")
+    row = cursor.fetchone()
+    conn.commit()
+    conn.close()
+    if row is None:
+        return 0
+    return row['version'] if hasattr(row, 'keys') else row[0]
+
+def apply_migrations(db) -> List[int]:
+    # Brings the database up to the latest version and returns the versions
+    # that were applied. Works on local SQLite and Turso alike.
+    current = get_schema_version(db)
+    applied = []
+
+    for version, description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+
+        statements = []
+        for step in steps:
+            if callable(step):
+                statements.extend((sql, ()) for sql in step(db))
+            else:
+                statements.append((step, ()))
+        statements.append((
+            "INSERT OR IGNORE INTO schema_version (version, description) VALUES (?, ?)",
+            (version, description)
+        ))
+
+        with db.transaction() as conn:
+            cursor = conn.cursor()
+            if db.use_turso:
+                cursor.execute_many_statements(statements)
+            else:
+                for sql, params in statements:
+                    cursor.execute(sql, params)
+
+        print(f"Applied schema migration {version}: {description}")
+        applied.append(version)
+
+    return applied
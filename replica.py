@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+# Tables mirrored from Turso, with the columns copied for each
+MIRRORED_TABLES = {
+    "tasks": ["id", "task_name", "category", "priority", "active", "created_at", "updated_at"],
+    "spin_history": ["id", "task_id", "spun_at", "completed", "notes", "updated_at"],
+    "spin_history_archive": ["id", "task_id", "spun_at", "completed", "notes", "updated_at"],
+}
+
+# Rows arriving in these tables were moved out of another one on the primary.
+# Deletes aren't synced, so the replica drops its hot copy itself.
+MOVED_FROM = {
+    "spin_history_archive": "spin_history",
+}
+
+# Rows are re-read from this far behind the watermark. A transaction can
+# commit a little after the timestamp it wrote, and this catches it.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+class EmbeddedReplica:
+    # A local SQLite copy of the Turso database. Reads are served from it;
+    # writes still go to Turso, and changes are pulled back incrementally
+    # using (updated_at, id) watermarks kept per table.
+    def __init__(self, local_db, sync_interval: float = 30.0, page_size: int = 5000):
+        self.local_db = local_db
+        self.sync_interval = sync_interval
+        self.page_size = page_size
+        self.last_sync = 0.0
+        self.dirty = True
+        self._lock = threading.RLock()
+
+        conn = self.local_db.get_connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS replica_state (
+                table_name TEXT PRIMARY KEY,
+                last_updated_at TEXT,
+                last_id INTEGER,
+                synced_at TIMESTAMP
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def get_connection(self):
+        return self.local_db.get_connection()
+
+    def mark_dirty(self):
+        # Called after a write so the next read pulls it back in
+        self.dirty = True
+
+    def maybe_sync(self, remote_db) -> bool:
+        # Concurrent readers wait for one sync instead of each running their
+        # own. Returns False if the sync failed and the copy may be stale.
+        with self._lock:
+            if self.dirty or time.monotonic() - self.last_sync >= self.sync_interval:
+                try:
+                    self.sync(remote_db)
+                except Exception as e:
+                    self.dirty = True
+                    print(f"Replica sync failed, reading from the primary: {e}")
+                    return False
+            return True
+
+    def _watermarks(self) -> Dict[str, tuple]:
+        conn = self.local_db.get_connection()
+        rows = conn.execute("SELECT table_name, last_updated_at, last_id FROM replica_state").fetchall()
+        conn.close()
+        watermarks = {table: ("", 0) for table in MIRRORED_TABLES}
+        for row in rows:
+            watermarks[row['table_name']] = (row['last_updated_at'] or "", row['last_id'] or 0)
+        return watermarks
+
+    def _pull_start(self, last_updated_at: str) -> str:
+        if not last_updated_at:
+            return ""
+        start = datetime.fromisoformat(last_updated_at) - SYNC_OVERLAP
+        return start.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+    def _apply(self, table: str, rows: List[Dict]) -> int:
+        # Returns how many rows were inserted or changed
+        columns = MIRRORED_TABLES[table]
+        assignments = ", ".join(f"{c} = excluded.{c}" for c in columns if c != "id")
+        sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT(id) DO UPDATE SET {assignments} "
+            # Rows re-read inside the overlap window are left alone
+            f"WHERE excluded.updated_at IS NOT {table}.updated_at"
+        )
+        # Rows and watermark land together; a failure rolls back and returns
+        # the connection to the pool
+        last = rows[-1]
+        with self.local_db.transaction() as conn:
+            changed = conn.executemany(sql, [tuple(row.get(c) for c in columns) for row in rows]).rowcount
+            if table in MOVED_FROM:
+                conn.executemany(f"DELETE FROM {MOVED_FROM[table]} WHERE id = ?", [(row['id'],) for row in rows])
+            conn.execute("""
+                INSERT INTO replica_state (table_name, last_updated_at, last_id, synced_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(table_name) DO UPDATE SET
+                    last_updated_at = excluded.last_updated_at,
+                    last_id = excluded.last_id,
+                    synced_at = excluded.synced_at
+            """, (table, last['updated_at'], last['id']))
+        return changed
+
+    def sync(self, remote_db) -> int:
+        # Pulls every row changed since the last sync and returns how many
+        # rows were read. All tables share one pipeline request per page.
+        # If any row changed here, remote_db's query cache is invalidated:
+        # its cached reads came from the replica before the sync.
+        with self._lock:
+            self.dirty = False
+            pulled = 0
+            changed = 0
+            cursors = {
+                table: (self._pull_start(last_updated_at), 0)
+                for table, (last_updated_at, _) in self._watermarks().items()
+            }
+
+            while cursors:
+                tables = list(cursors)
+                statements = []
+                for table in tables:
+                    after_updated_at, after_id = cursors[table]
+                    statements.append((
+                        f"SELECT {', '.join(MIRRORED_TABLES[table])} FROM {table} "
+                        f"WHERE (updated_at, id) > (?, ?) "
+                        f"ORDER BY updated_at, id LIMIT ?",
+                        (after_updated_at, after_id, self.page_size)
+                    ))
+
+                results = remote_db.fetch_batch(statements)
+                for table, rows in zip(tables, results):
+                    if rows:
+                        changed += self._apply(table, rows)
+                        pulled += len(rows)
+                        last = rows[-1]
+                        cursors[table] = (last['updated_at'], last['id'])
+                    if len(rows) < self.page_size:
+                        del cursors[table]
+
+            self.last_sync = time.monotonic()
+            if changed:
+                # Not data_changed(): that marks the replica dirty again
+                remote_db.query_cache.bump_version()
+            return pulled
+
+_replicas = {}
+_replicas_lock = threading.Lock()
+
+def get_replica(local_db, **settings) -> EmbeddedReplica:
+    # One replica per local file per process, shared by every session
+    key = os.path.abspath(local_db.db_path)
+    with _replicas_lock:
+        if key not in _replicas:
+            _replicas[key] = EmbeddedReplica(local_db, **settings)
+        return _replicas[key]
@@ -1,85 +1,206 @@
+import functools
+import os
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import Dict, List
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Tuple
 import streamlit as st
 
-def generate_daily_report(db) -> str:
+from exporter import EXPORT_FORMATS, available_formats, export_spins, remove_export, sweep_exports
+
+REPORT_TYPES = ("daily", "weekly", "monthly")
+
+# Streamlit holds a download in memory once it is clicked, so exports for
+# the download button stop at this many spins (about 30 MB of CSV)
+MAX_DOWNLOAD_SPINS = 200_000
+
+# strftime('%w') numbering, as in get_report_aggregates
+WEEKDAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+def cached_report(db, report_type: str, start, end, build: Callable[[], str], as_of=None) -> str:
+    # Serves a report from db.report_cache while nothing it covers has been
+    # written since it was built. A closed period stays cached however much
+    # is written to later ones. as_of keys reports whose text depends on
+    # the current date.
+    key = (report_type, str(start), str(end), str(as_of))
+    version = db.get_data_version()
+    entry = db.report_cache.get(key)
+    if entry is not None:
+        built_at, report = entry
+        if built_at == version:
+            return report
+        if not db.period_changed_since(built_at, start, end):
+            db.report_cache.put(key, version, report)
+            return report
+    
+    report = build()
+    db.report_cache.put(key, version, report)
+    return report
+
+def period_bounds(report_type: str, day: date) -> Tuple[date, date]:
+    # [start, end) of the daily, weekly (Monday first) or monthly period
+    # that contains day
+    if report_type == "daily":
+        return day, day + timedelta(days=1)
+    if report_type == "weekly":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    if report_type == "monthly":
+        start = day.replace(day=1)
+        return start, (start + timedelta(days=32)).replace(day=1)
+    raise ValueError(f"Unknown report type: {report_type}")
+
+def build_report(db, report_type: str, start: date, end: date, today: date) -> str:
+    builders = {"daily": _daily_report, "weekly": _weekly_report, "monthly": _monthly_report}
+    return builders[report_type](db, start, end, today)
+
+def report_is_current(db, saved: Dict, start: date, end: date) -> bool:
+    # A stored report stands until something in its period is written
+    return saved is not None and not db.period_changed_since(saved['data_version'], start, end)
+
+def save_period_report(db, report_type: str, start: date, end: date) -> str:
+    # Builds a closed period's report and stores it, with its aggregates,
+    # in the reports table. Another process may have written since the
+    # cached reads were loaded, so they are dropped after the version is
+    # taken: the report is built from data at least as new as its stamp.
+    version = db.get_data_version()
+    db.query_cache.invalidate("get_spins_frame", "get_report_aggregates")
+    content = build_report(db, report_type, start, end, datetime.now().date())
+    db.save_report(report_type, start, end, content, db.get_report_aggregates(start, end), version)
+    return content
+
+def generate_report(db, report_type: str, day: date = None) -> str:
+    # Only the open period is built live. Closed ones come from the reports
+    # table, where the scheduler usually put them already.
     today = datetime.now().date()
-    today_start = datetime.combine(today, datetime.min.time())
-    
-    history = db.get_spin_history(limit=1000)
-    today_spins = [h for h in history if datetime.fromisoformat(h['spun_at']).date() == today]
-    
-    if not today_spins:
-        return "**No activity today yet.** Spin the wheel to get started"
-    
-    report = f"# Daily Report - {today.strftime('%B %d, %Y')}\n\n"
+    start, end = period_bounds(report_type, day or today)
+    if end > today:
+        return cached_report(
+            db, report_type, start, end, lambda: build_report(db, report_type, start, end, today), as_of=today
+        )
+    
+    saved = db.get_saved_report(report_type, start)
+    if report_is_current(db, saved, start, end):
+        return saved['content']
+    return save_period_report(db, report_type, start, end)
+
+def generate_daily_report(db) -> str:
+    return generate_report(db, "daily")
+
+def summarize_spins(spins: pd.DataFrame, start) -> Dict:
+    # Every report section from one frame of get_spins_frame, in the shape
+    # of get_report_aggregates, using grouped reductions only
+    spin_dates = spins['spun_at'].dt.normalize()
+    
+    def ranked(column: str) -> List[Dict]:
+        counts = spins.groupby(column, observed=True)['completed'].agg(spins='size', completed='sum')
+        counts.index = counts.index.astype(str)
+        counts = counts.rename_axis(column).reset_index()
+        return counts.sort_values(['spins', column], ascending=[False, True]).to_dict('records')
+    
+    by_weekday = spins.groupby((spin_dates.dt.dayofweek + 1) % 7).size()
+    weeks = (spin_dates - pd.Timestamp(start)).dt.days // 7 + 1
+    by_week = spins.groupby(weeks).size()
+    return {
+        "totals": {
+            "spins": len(spins),
+            "completed": int(spins['completed'].sum()),
+            "active_days": int(spin_dates.nunique())
+        },
+        "by_task": ranked('task_name'),
+        "by_category": ranked('category'),
+        "by_weekday": [{"weekday": int(day), "spins": int(n)} for day, n in by_weekday.items()],
+        "by_week": [{"week": int(week), "spins": int(n)} for week, n in by_week.items()]
+    }
+
+def _daily_report(db, day: date, next_day: date, today: date) -> str:
+    # One day's spins are listed individually, so the day is loaded once
+    # and summarized from the same frame
+    spins = db.get_spins_frame(day, next_day)
+    totals = summarize_spins(spins, day)['totals']
+    total_spins = totals['spins']
+    live = day == today
+    
+    if total_spins == 0:
+        if live:
+            return "**No activity today yet.** Spin the wheel to get started"
+        return f"**No activity on {day.strftime('%B %d, %Y')}.**"
+    
+    report = f"# Daily Report - {day.strftime('%B %d, %Y')}\n\n"
     report += f"## Summary\n"
-    report += f"- **Total Spins Today:** {len(today_spins)}\n"
+    report += f"- **Total Spins{' Today' if live else ''}:** {total_spins}\n"
     
-    completed = sum(1 for s in today_spins if s['completed'])
-    report += f"- **Completed:** {completed}/{len(today_spins)}\n"
-    report += f"- **Completion Rate:** {(completed/len(today_spins)*100):.1f}%\n\n"
+    completed = totals['completed']
+    report += f"- **Completed:** {completed}/{total_spins}\n"
+    report += f"- **Completion Rate:** {(completed/total_spins*100):.1f}%\n\n"
     
     report += f"## Tasks Worked On\n"
-    for spin in today_spins:
-        time = datetime.fromisoformat(spin['spun_at']).strftime('%I:%M %p')
-        status = "[Completed]" if spin['completed'] else "[Pending]"
-        report += f"{status} **{spin['task_name']}** ({spin['category']}) - {time}\n"
-        if spin['notes']:
-            report += f"   *Note: {spin['notes']}*\n"
+    # Newest first; the frame comes oldest first
+    spins = spins.iloc[::-1]
+    lines = (
+        spins['completed'].map({True: "[Completed]", False: "[Pending]"})
+        + " **" + spins['task_name'].astype(str) + "** (" + spins['category'].astype(str) + ") - "
+        # Legacy spun_at values that aren't timestamps are NaT in the frame
+        + spins['spun_at'].dt.strftime('%I:%M %p').fillna("--:--") + "\n"
+    )
+    has_note = spins['notes'].fillna("") != ""
+    lines[has_note] = lines[has_note] + "   *Note: " + spins.loc[has_note, 'notes'] + "*\n"
+    report += "".join(lines)
     
     return report
 
+def _custom_report(sections: Dict, start_date, end_date) -> str:
+    total_spins = sections['totals']['spins']
+    report = f"### Custom Report: {start_date} to {end_date}\n"
+    report += f"- **Total Spins:** {total_spins}\n"
+    completed = sections['totals']['completed']
+    report += f"- **Completion Rate:** {(completed/total_spins*100):.1f}%\n"
+    report += f"- **Active Days:** {sections['totals']['active_days']}\n\n"
+    
+    report += f"#### Most Worked Tasks\n"
+    for row in sections['by_task'][:10]:
+        report += f"- **{row['task_name']}**: {row['spins']} times\n"
+    
+    report += f"\n#### Category Breakdown\n"
+    for row in sections['by_category']:
+        completion = row['completed'] / row['spins'] * 100
+        report += f"- **{row['category']}**: {row['spins']} spins, {completion:.1f}% completion\n"
+    return report
+
 def generate_weekly_report(db) -> str:
-    today = datetime.now().date()
-    week_start = today - timedelta(days=today.weekday())
-    week_start_dt = datetime.combine(week_start, datetime.min.time())
-    
-    history = db.get_spin_history(limit=1000)
-    week_spins = [h for h in history if datetime.fromisoformat(h['spun_at']) >= week_start_dt]
+    return generate_report(db, "weekly")
+
+def _weekly_report(db, week_start: date, next_week: date, today: date) -> str:
+    week_end = next_week - timedelta(days=1)
+    aggregates = db.get_report_aggregates(week_start, next_week)
+    total_spins = int(aggregates['totals']['spins'])
     
-    if not week_spins:
-        return "**No activity this week yet.** Start spinning"
+    if total_spins == 0:
+        if today < next_week:
+            return "**No activity this week yet.** Start spinning"
+        return f"**No activity in the week of {week_start.strftime('%b %d, %Y')}.**"
     
-    week_end = week_start + timedelta(days=6)
     report = f"# Weekly Report - {week_start.strftime('%b %d')} to {week_end.strftime('%b %d, %Y')}\n\n"
     
     report += f"## Overview\n"
-    report += f"- **Total Spins:** {len(week_spins)}\n"
-    
-    completed = sum(1 for s in week_spins if s['completed'])
-    report += f"- **Completed:** {completed}/{len(week_spins)}\n"
-    report += f"- **Completion Rate:** {(completed/len(week_spins)*100):.1f}%\n\n"
-    
-    task_counts = {}
-    category_counts = {}
+    report += f"- **Total Spins:** {total_spins}\n"
     
-    for spin in week_spins:
-        task_name = spin['task_name']
-        category = spin['category']
-        
-        task_counts[task_name] = task_counts.get(task_name, 0) + 1
-        category_counts[category] = category_counts.get(category, 0) + 1
+    completed = int(aggregates['totals']['completed'])
+    report += f"- **Completed:** {completed}/{total_spins}\n"
+    report += f"- **Completion Rate:** {(completed/total_spins*100):.1f}%\n\n"
     
     report += f"## Most Worked Tasks\n"
-    sorted_tasks = sorted(task_counts.items(), key=lambda x: x[1], reverse=True)
-    for task, count in sorted_tasks[:5]:
-        report += f"- **{task}**: {count} times\n"
+    for row in aggregates['by_task'][:5]:
+        report += f"- **{row['task_name']}**: {int(row['spins'])} times\n"
     
     report += f"\n## Category Breakdown\n"
-    sorted_categories = sorted(category_counts.items(), key=lambda x: x[1], reverse=True)
-    for category, count in sorted_categories:
-        percentage = (count / len(week_spins) * 100)
-        report += f"- **{category}**: {count} spins ({percentage:.1f}%)\n"
+    for row in aggregates['by_category']:
+        percentage = (row['spins'] / total_spins * 100)
+        report += f"- **{row['category']}**: {int(row['spins'])} spins ({percentage:.1f}%)\n"
     
-    daily_activity = {}
-    for spin in week_spins:
-        day = datetime.fromisoformat(spin['spun_at']).strftime('%A')
-        daily_activity[day] = daily_activity.get(day, 0) + 1
+    daily_activity = {WEEKDAY_NAMES[row['weekday']]: int(row['spins']) for row in aggregates['by_weekday']}
     
     report += f"\n## Daily Activity\n"
-    days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    days_order = WEEKDAY_NAMES[1:] + WEEKDAY_NAMES[:1]
     for day in days_order:
         count = daily_activity.get(day, 0)
         bar = "█" * count
@@ -88,106 +209,93 @@ def generate_weekly_report(db) -> str:
     return report
 
 def generate_monthly_report(db) -> str:
-    today = datetime.now().date()
-    month_start = today.replace(day=1)
-    month_start_dt = datetime.combine(month_start, datetime.min.time())
-    
-    history = db.get_spin_history(limit=10000)
-    month_spins = [h for h in history if datetime.fromisoformat(h['spun_at']) >= month_start_dt]
+    return generate_report(db, "monthly")
+
+def _monthly_report(db, month_start: date, next_month: date, today: date) -> str:
+    aggregates = db.get_report_aggregates(month_start, next_month)
+    total_spins = int(aggregates['totals']['spins'])
     
-    if not month_spins:
-        return f"**No activity in {today.strftime('%B %Y')} yet.** Get spinning"
+    if total_spins == 0:
+        if today < next_month:
+            return f"**No activity in {month_start.strftime('%B %Y')} yet.** Get spinning"
+        return f"**No activity in {month_start.strftime('%B %Y')}.**"
     
-    report = f"# Monthly Report - {today.strftime('%B %Y')}\n\n"
+    report = f"# Monthly Report - {month_start.strftime('%B %Y')}\n\n"
     
     report += f"## Key Metrics\n"
-    report += f"- **Total Spins:** {len(month_spins)}\n"
+    report += f"- **Total Spins:** {total_spins}\n"
     
-    completed = sum(1 for s in month_spins if s['completed'])
-    report += f"- **Completed:** {completed}/{len(month_spins)}\n"
-    report += f"- **Completion Rate:** {(completed/len(month_spins)*100):.1f}%\n"
+    completed = int(aggregates['totals']['completed'])
+    report += f"- **Completed:** {completed}/{total_spins}\n"
+    report += f"- **Completion Rate:** {(completed/total_spins*100):.1f}%\n"
     
-    unique_days = len(set(datetime.fromisoformat(s['spun_at']).date() for s in month_spins))
-    report += f"- **Active Days:** {unique_days}/{today.day}\n"
-    report += f"- **Average Spins/Day:** {len(month_spins)/unique_days:.1f}\n\n"
-    
-    task_counts = {}
-    for spin in month_spins:
-        task_name = spin['task_name']
-        task_counts[task_name] = task_counts.get(task_name, 0) + 1
+    unique_days = int(aggregates['totals']['active_days'])
+    days_so_far = (min(today, next_month - timedelta(days=1)) - month_start).days + 1
+    report += f"- **Active Days:** {unique_days}/{days_so_far}\n"
+    report += f"- **Average Spins/Day:** {total_spins/unique_days:.1f}\n\n"
     
     report += f"## Top Performing Tasks\n"
-    sorted_tasks = sorted(task_counts.items(), key=lambda x: x[1], reverse=True)
-    for i, (task, count) in enumerate(sorted_tasks[:10], 1):
-        report += f"{i}. **{task}**: {count} times\n"
-    
-    category_stats = {}
-    for spin in month_spins:
-        category = spin['category']
-        if category not in category_stats:
-            category_stats[category] = {'total': 0, 'completed': 0}
-        category_stats[category]['total'] += 1
-        if spin['completed']:
-            category_stats[category]['completed'] += 1
+    for i, row in enumerate(aggregates['by_task'][:10], 1):
+        report += f"{i}. **{row['task_name']}**: {int(row['spins'])} times\n"
     
     report += f"\n## Category Performance\n"
-    for category, stats in sorted(category_stats.items(), key=lambda x: x[1]['total'], reverse=True):
-        completion = (stats['completed'] / stats['total'] * 100) if stats['total'] > 0 else 0
-        report += f"- **{category}**: {stats['total']} spins, {completion:.1f}% completion\n"
-    
-    weekly_activity = {}
-    for spin in month_spins:
-        week_num = (datetime.fromisoformat(spin['spun_at']).day - 1) // 7 + 1
-        weekly_activity[f"Week {week_num}"] = weekly_activity.get(f"Week {week_num}", 0) + 1
+    for row in aggregates['by_category']:
+        completion = (row['completed'] / row['spins'] * 100) if row['spins'] > 0 else 0
+        report += f"- **{row['category']}**: {int(row['spins'])} spins, {completion:.1f}% completion\n"
     
+    # Weeks are 7-day blocks from the 1st
     report += f"\n## Weekly Breakdown\n"
-    for week in sorted(weekly_activity.keys()):
-        count = weekly_activity[week]
+    for row in aggregates['by_week']:
+        count = int(row['spins'])
         bar = "█" * (count // 2)
-        report += f"- **{week}**: {bar} ({count} spins)\n"
+        report += f"- **Week {row['week']}**: {bar} ({count} spins)\n"
     
     return report
 
+def _period_label(report_type: str, start: date, current: date) -> str:
+    if report_type == "daily":
+        return "Today" if start == current else start.strftime('%b %d, %Y')
+    if report_type == "weekly":
+        return "This week" if start == current else f"Week of {start.strftime('%b %d, %Y')}"
+    return "This month" if start == current else start.strftime('%B %Y')
+
+def display_period_report(db, report_type: str, title: str):
+    # The open period plus every closed one in the reports table
+    current = period_bounds(report_type, datetime.now().date())[0]
+    periods = [current] + [
+        date.fromisoformat(saved['period_start'])
+        for saved in db.list_saved_reports(report_type)
+        if saved['period_start'] != str(current)
+    ]
+    start = st.selectbox(
+        "Period", periods, format_func=lambda d: _period_label(report_type, d, current),
+        key=f"{report_type}_period"
+    )
+    
+    report_text = generate_report(db, report_type, start)
+    st.markdown(report_text)
+    
+    if st.button(f"Export {title} Report", key=f"export_{report_type}"):
+        st.download_button(
+            label="Download as Text",
+            data=report_text,
+            file_name=f"{report_type}_report_{start.strftime('%Y%m%d')}.txt",
+            mime="text/plain"
+        )
+
 def display_report_dashboard(db):
     st.title("Reports Dashboard")
     
     tab1, tab2, tab3, tab4 = st.tabs(["Daily", "Weekly", "Monthly", "Custom"])
     
     with tab1:
-        st.markdown(generate_daily_report(db))
-        
-        if st.button("Export Daily Report", key="export_daily"):
-            report_text = generate_daily_report(db)
-            st.download_button(
-                label="Download as Text",
-                data=report_text,
-                file_name=f"daily_report_{datetime.now().strftime('%Y%m%d')}.txt",
-                mime="text/plain"
-            )
+        display_period_report(db, "daily", "Daily")
     
     with tab2:
-        st.markdown(generate_weekly_report(db))
-        
-        if st.button("Export Weekly Report", key="export_weekly"):
-            report_text = generate_weekly_report(db)
-            st.download_button(
-                label="Download as Text",
-                data=report_text,
-                file_name=f"weekly_report_{datetime.now().strftime('%Y%m%d')}.txt",
-                mime="text/plain"
-            )
+        display_period_report(db, "weekly", "Weekly")
     
     with tab3:
-        st.markdown(generate_monthly_report(db))
-        
-        if st.button("Export Monthly Report", key="export_monthly"):
-            report_text = generate_monthly_report(db)
-            st.download_button(
-                label="Download as Text",
-                data=report_text,
-                file_name=f"monthly_report_{datetime.now().strftime('%Y%m%d')}.txt",
-                mime="text/plain"
-            )
+        display_period_report(db, "monthly", "Monthly")
     
     with tab4:
         st.subheader("Custom Date Range Report")
@@ -199,32 +307,80 @@ def display_report_dashboard(db):
             end_date = st.date_input("End Date", value=datetime.now().date())
         
         if st.button("Generate Custom Report"):
-            history = db.get_spin_history(limit=10000)
-            filtered_spins = [
-                h for h in history 
-                if start_date <= datetime.fromisoformat(h['spun_at']).date() <= end_date
-            ]
+            # Loaded once; the summary and table both come from this frame
+            spins = db.get_spins_frame(start_date, end_date + timedelta(days=1))
             
-            if not filtered_spins:
+            if spins.empty:
                 st.warning("No data in selected date range")
             else:
-                df = pd.DataFrame(filtered_spins)
-                
-                st.markdown(f"### Custom Report: {start_date} to {end_date}")
-                st.write(f"**Total Spins:** {len(filtered_spins)}")
-                
-                completed = sum(1 for s in filtered_spins if s['completed'])
-                st.write(f"**Completion Rate:** {(completed/len(filtered_spins)*100):.1f}%")
+                st.markdown(_custom_report(summarize_spins(spins, start_date), start_date, end_date))
                 
                 st.dataframe(
-                    df[['spun_at', 'task_name', 'category', 'completed']],
+                    spins[['spun_at', 'task_name', 'category', 'completed']],
                     use_container_width=True
                 )
-                
-                csv = df.to_csv(index=False)
-                st.download_button(
-                    label="Download CSV",
-                    data=csv,
-                    file_name=f"custom_report_{start_date}_{end_date}.csv",
-                    mime="text/csv"
-                )
+        
+        display_export(db, start_date, end_date)
+
+def _read_export(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def display_export(db, start_date, end_date):
+    # The file is written in chunks to a temp file, so a long range never
+    # sits in memory as a DataFrame or a CSV string while it is exported.
+    # Streamlit reads the whole file into memory when the download is
+    # clicked, so ranges over MAX_DOWNLOAD_SPINS are refused. The file is
+    # removed once the range or format changes, after EXPORT_TTL_SECONDS,
+    # or at exit.
+    st.markdown("#### Export Spins")
+    st.caption(f"Exports are limited to {MAX_DOWNLOAD_SPINS:,} spins; pick a shorter range for more.")
+    fmt = st.selectbox("Format", available_formats(), key="export_format")
+    export_key = (str(start_date), str(end_date), fmt)
+    sweep_exports()
+    
+    previous = st.session_state.get('export_file')
+    if previous and previous['key'] != export_key:
+        remove_export(previous['path'])
+        del st.session_state['export_file']
+    
+    if st.button("Prepare Export", key="prepare_export"):
+        previous = st.session_state.pop('export_file', None)
+        if previous:
+            remove_export(previous['path'])
+        
+        # From the rollup, so checking the limit doesn't cost a pass over the spins
+        total = int(db.get_report_aggregates(start_date, end_date + timedelta(days=1))['totals']['spins'])
+        if total > MAX_DOWNLOAD_SPINS:
+            st.warning(
+                f"This range has {total:,} spins, over the {MAX_DOWNLOAD_SPINS:,} that can be "
+                f"downloaded at once. Export a shorter range."
+            )
+            return
+        
+        bar = st.progress(0.0, text="Exporting spins")
+        def progress(done: int, total: int):
+            bar.progress(min(done / total, 1.0) if total else 1.0, text=f"Exported {done:,} of {total:,} spins")
+        
+        try:
+            path = export_spins(db, start_date, end_date + timedelta(days=1), fmt, progress=progress)
+        except Exception as e:
+            st.error(f"Export failed: {e}")
+        else:
+            suffix, mime = EXPORT_FORMATS[fmt]
+            st.session_state.export_file = {
+                "key": export_key,
+                "path": path,
+                "file_name": f"spins_{start_date}_{end_date}{suffix}",
+                "mime": mime
+            }
+    
+    export_file = st.session_state.get('export_file')
+    if export_file and os.path.exists(export_file['path']):
+        st.download_button(
+            label=f"Download {export_file['file_name']}",
+            data=functools.partial(_read_export, export_file['path']),
+            file_name=export_file['file_name'],
+            mime=export_file['mime'],
+            key="download_export"
+        )
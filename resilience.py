@@ -0,0 +1,176 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable
+
+try:
+    import requests
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+def is_read_only_sql(sql: str) -> bool:
+    statement = sql.lstrip().upper()
+    if statement.startswith(("SELECT", "EXPLAIN")):
+        return True
+    if statement.startswith("WITH"):
+        return not any(word in statement for word in ("INSERT", "UPDATE", "DELETE", "REPLACE"))
+    return False
+
+def is_transient(error: Exception) -> bool:
+    # Worth another try: timeouts, dropped connections, 5xx and 429 responses
+    if not REQUESTS_AVAILABLE:
+        return False
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return False
+
+def never_reached_server(error: Exception) -> bool:
+    # Only these are safe to retry for writes: the request was never sent
+    return REQUESTS_AVAILABLE and isinstance(error, requests.ConnectTimeout)
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.1, max_delay: float = 2.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        # Exponential backoff with full jitter, so retrying clients spread out
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+class CircuitBreaker:
+    # Opens after failure_threshold consecutive transient failures and fails
+    # fast until reset_timeout has passed; then a single trial call decides
+    # whether to close again.
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half-open" and self.trial_in_flight):
+                raise CircuitOpenError("Turso circuit breaker is open; failing fast")
+            if state == "half-open":
+                self.trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+class LatencyTracker:
+    # Recent request latencies, for deciding when a read is slow enough to hedge
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float):
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="turso-hedge")
+
+class ResilientCaller:
+    # Wraps each Turso request with retries, optional hedging and a circuit
+    # breaker. Request timeouts are set on the HTTP session pool.
+    def __init__(self, retry: RetryPolicy = None, breaker: CircuitBreaker = None,
+                 hedge_reads: bool = False, hedge_percentile: float = 95.0):
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.hedge_reads = hedge_reads
+        self.hedge_percentile = hedge_percentile
+
+    def _hedged(self, fn: Callable):
+        # Send a duplicate once the first request is slower than the chosen
+        # percentile, and take whichever answers first
+        delay = self.latency.percentile(self.hedge_percentile)
+        if delay is None:
+            return fn()
+
+        futures = [_hedge_executor.submit(fn)]
+        done, _ = wait(futures, timeout=delay)
+        if not done:
+            futures.append(_hedge_executor.submit(fn))
+
+        error = None
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.remove(future)
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def call(self, fn: Callable, idempotent: bool):
+        for attempt in range(self.retry.max_attempts):
+            self.breaker.before_call()
+            start = time.monotonic()
+            try:
+                if idempotent and self.hedge_reads:
+                    result = self._hedged(fn)
+                else:
+                    result = fn()
+            except Exception as e:
+                if not is_transient(e):
+                    # The service answered; it's the request that's wrong
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                retryable = idempotent or never_reached_server(e)
+                if not retryable or attempt == self.retry.max_attempts - 1:
+                    raise
+                time.sleep(self.retry.delay(attempt))
+                continue
+
+            self.latency.record(time.monotonic() - start)
+            self.breaker.record_success()
+            return result
+
+_callers = {}
+_callers_lock = threading.Lock()
+
+def get_resilient_caller(url: str, **settings) -> ResilientCaller:
+    # One breaker and latency history per database per process
+    with _callers_lock:
+        if url not in _callers:
+            _callers[url] = ResilientCaller(**settings)
+        return _callers[url]
@@ -0,0 +1,94 @@
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from database import secret_settings
+from reports import REPORT_TYPES, period_bounds, report_is_current, save_period_report
+
+def closed_periods(today: date, lookback: int = 1) -> List[Tuple[str, date, date]]:
+    # The lookback most recent closed periods of each report type, newest
+    # first, as (report_type, start, end)
+    periods = []
+    for report_type in REPORT_TYPES:
+        start, _ = period_bounds(report_type, today)
+        for _ in range(lookback):
+            start, end = period_bounds(report_type, start - timedelta(days=1))
+            periods.append((report_type, start, end))
+    return periods
+
+def precompute_reports(db, today: date = None, lookback: int = 1) -> List[Tuple[str, date]]:
+    # Stores the reports of closed periods that are missing from the reports
+    # table or were written to since. Returns the (report_type, start) built.
+    today = today or datetime.now().date()
+    built = []
+    for report_type, start, end in closed_periods(today, lookback):
+        if report_is_current(db, db.get_saved_report(report_type, start), start, end):
+            continue
+        save_period_report(db, report_type, start, end)
+        built.append((report_type, start))
+    return built
+
+class ReportScheduler:
+    # Precomputes closed periods on start and again shortly after every
+    # midnight, so a day, week or month is stored as soon as it closes.
+    # Several servers may run one each: saving a report is an upsert.
+    def __init__(self, db, lookback: int = 1, delay_seconds: float = 60.0,
+                 retry_seconds: float = 300.0, start: bool = True):
+        self.db = db
+        self.lookback = lookback
+        self.delay_seconds = delay_seconds
+        self.retry_seconds = retry_seconds
+        self.last_run = None
+        self.last_error = None
+        self._stopped = threading.Event()
+
+        self._worker = threading.Thread(target=self.run_forever, name="report-scheduler", daemon=True)
+        if start:
+            self._worker.start()
+
+    def run_once(self) -> bool:
+        try:
+            built = precompute_reports(self.db, lookback=self.lookback)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Precomputing reports failed, retrying in {self.retry_seconds:.0f}s: {e}")
+            return False
+        self.last_run = datetime.now()
+        self.last_error = None
+        if built:
+            print(f"Precomputed {len(built)} reports: " + ", ".join(f"{t} {s}" for t, s in built))
+        return True
+
+    def seconds_until_next_run(self, now: datetime) -> float:
+        # Periods close at local midnight
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        return (midnight - now).total_seconds() + self.delay_seconds
+
+    def run_forever(self):
+        while not self._stopped.is_set():
+            if self.run_once():
+                wait = self.seconds_until_next_run(datetime.now())
+            else:
+                wait = self.retry_seconds
+            self._stopped.wait(wait)
+
+    def stop(self):
+        self._stopped.set()
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def get_report_scheduler(db) -> Optional[ReportScheduler]:
+    # None unless [reports] precompute = true; one scheduler per database
+    # per process
+    settings = secret_settings("reports")
+    if not settings.get("precompute", False):
+        return None
+    database_key = db.turso_url if db.use_turso else os.path.abspath(db.db_path)
+    with _schedulers_lock:
+        if database_key not in _schedulers:
+            _schedulers[database_key] = ReportScheduler(
+                db, lookback=int(settings.get("precompute_lookback", 1))
+            )
+        return _schedulers[database_key]
@@ -0,0 +1,29 @@
+from database import TaskDatabase
+
+def _archived_db(tmp_path):
+    db = TaskDatabase(db_path=str(tmp_path / "spins.db"), local_only=True)
+    task_id = db.add_task("Clean gutters")
+    db.record_spins_bulk([
+        {"task_id": task_id, "spun_at": "2020-03-01 09:00:00"},
+        {"task_id": task_id, "spun_at": "2020-03-02 09:00:00"},
+    ])
+    assert db.archive_spins(horizon_days=365) == 2
+    return db, task_id
+
+def test_history_is_newest_first_across_the_archive(tmp_path):
+    db, task_id = _archived_db(tmp_path)
+    # Imported after the archive run, so older than what was archived
+    db.record_spins_bulk([{"task_id": task_id, "spun_at": "2019-01-01 09:00:00"}])
+    db.record_spin(task_id)
+
+    history = db.get_spin_history(limit=3)
+    assert [h['spun_at'][:10] for h in history[1:]] == ["2020-03-02", "2020-03-01"]
+
+def test_archive_counts_the_spins_each_batch_moved(tmp_path):
+    db, task_id = _archived_db(tmp_path)
+    db.record_spins_bulk([
+        {"task_id": task_id, "spun_at": f"2020-04-0{day} 09:00:00"} for day in range(1, 6)
+    ])
+    assert db.archive_spins(horizon_days=365, batch_size=2) == 5
+    assert db.archive_spins(horizon_days=365, batch_size=2) == 0
+    assert db.get_task_frequency() == [("Clean gutters", 7)]
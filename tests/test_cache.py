@@ -0,0 +1,19 @@
+from datetime import date
+
+from database import TaskDatabase
+
+def test_saving_a_report_keeps_other_queries_cached(tmp_path):
+    db = TaskDatabase(db_path=str(tmp_path / "spins.db"), local_only=True)
+    db.add_task("Go for a run")
+    assert db.get_task_count() == 1
+    assert db.get_saved_report("daily", date(2024, 5, 1)) is None
+    version = db.query_cache.data_version
+
+    db.save_report("daily", date(2024, 5, 1), date(2024, 5, 2), "report", {"totals": {}}, "v1")
+
+    assert db.query_cache.data_version == version
+    hits = db.query_cache.hits
+    assert db.get_task_count() == 1
+    assert db.query_cache.hits == hits + 1
+    assert db.get_saved_report("daily", date(2024, 5, 1))['content'] == "report"
+    assert [r['period_start'] for r in db.list_saved_reports("daily")] == ["2024-05-01"]
@@ -0,0 +1,22 @@
+import sqlite3
+
+from database import TaskDatabase
+from turso_emulator import TursoEmulator
+
+def test_spins_frame_is_the_same_over_turso(tmp_path):
+    path = str(tmp_path / "primary.db")
+    with TursoEmulator(path).start() as emulator:
+        remote = TaskDatabase(turso_url=emulator.url, turso_token="test")
+        task_id = remote.add_task("Sweep porch")
+        remote.record_spins_bulk([{"task_id": task_id, "spun_at": "2024-01-05 09:00:00"}])
+        # A legacy value written before spun_at was normalized
+        conn = sqlite3.connect(path)
+        conn.execute("INSERT INTO spin_history (task_id, spun_at) VALUES (?, '2024-01-05 at noon')", (task_id,))
+        conn.commit()
+        conn.close()
+
+        local = TaskDatabase(db_path=path, local_only=True)
+        frames = [db.get_spins_frame("2024-01-01", "2024-02-01") for db in (remote, local)]
+        for frame in frames:
+            assert len(frame) == 2
+            assert frame['spun_at'].isna().sum() == 1
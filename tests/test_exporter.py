@@ -0,0 +1,44 @@
+import os
+from datetime import date
+
+import pandas as pd
+
+from database import TaskDatabase
+from exporter import export_spins, remove_export, sweep_exports
+
+def test_temp_exports_are_swept(tmp_path):
+    db = TaskDatabase(db_path=str(tmp_path / "spins.db"), local_only=True)
+    task_id = db.add_task("Call a friend")
+    db.record_spins_bulk([{"task_id": task_id, "spun_at": "2024-02-01 10:00:00"}])
+
+    kept = str(tmp_path / "kept.csv")
+    assert export_spins(db, date(2024, 2, 1), date(2024, 3, 1), path=kept) == kept
+    first = export_spins(db, date(2024, 2, 1), date(2024, 3, 1))
+    second = export_spins(db, date(2024, 2, 1), date(2024, 3, 1), fmt="csv.gz")
+    with open(first) as f:
+        assert f.read().splitlines()[1].startswith("1,2024-02-01 10:00:00,")
+
+    remove_export(first)
+    assert not os.path.exists(first)
+    assert sweep_exports(max_age_seconds=3600) == 0
+    assert sweep_exports(max_age_seconds=0) == 1
+    assert not os.path.exists(second)
+    # Only temp files are ever removed
+    assert os.path.exists(kept)
+
+def test_parquet_export_keeps_legacy_spun_at(tmp_path):
+    db = TaskDatabase(db_path=str(tmp_path / "spins.db"), local_only=True)
+    task_id = db.add_task("Call a friend")
+    db.record_spins_bulk([{"task_id": task_id, "spun_at": "2024-02-01 10:00:00"}])
+    # A legacy value written before spun_at was normalized
+    conn = db.get_connection()
+    conn.execute("INSERT INTO spin_history (task_id, spun_at) VALUES (?, '2024-02-01 at noon')", (task_id,))
+    conn.commit()
+    conn.close()
+    db.data_changed()
+
+    path = export_spins(db, date(2024, 2, 1), date(2024, 3, 1), fmt="parquet", chunk_size=1)
+    frame = pd.read_parquet(path)
+    remove_export(path)
+    assert len(frame) == 2
+    assert frame['spun_at'].isna().sum() == 1
@@ -0,0 +1,56 @@
+import io
+from datetime import date
+
+from database import TaskDatabase
+from importer import import_spins
+
+def test_import_spins_normalizes_spun_at(tmp_path):
+    db = TaskDatabase(db_path=str(tmp_path / "spins.db"), local_only=True)
+    data = (
+        "task_name,spun_at,completed\n"
+        "Stretch,01/05/2024,yes\n"
+        "Stretch,2024-01-06T08:30:00,no\n"
+        "Stretch,2024-01-06T23:30:00-02:00,no\n"
+        "Stretch,last tuesday,no\n"
+    )
+    result = import_spins(db, io.StringIO(data), "spins.csv")
+    assert result == {"spins": 3, "tasks_created": 1, "rejected": 1, "skipped": 0}
+
+    spins = list(db.iter_spin_history(since=date(2024, 1, 5), until=date(2024, 1, 8)))
+    assert sorted(s['spun_at'] for s in spins) == [
+        "2024-01-05 00:00:00", "2024-01-06 08:30:00", "2024-01-07 01:30:00"
+    ]
+    assert db.get_task_frequency() == [("Stretch", 3)]
+
+def test_import_spins_rejects_unknown_task_ids(tmp_path):
+    db = TaskDatabase(db_path=str(tmp_path / "spins.db"), local_only=True)
+    task_id = db.add_task("Stretch")
+    data = (
+        "task_id,spun_at\n"
+        f"{task_id},2024-01-05 09:00:00\n"
+        "abc,2024-01-05 10:00:00\n"
+        f"{task_id + 100},2024-01-05 11:00:00\n"
+        f"{task_id},2024-01-05 12:00:00\n"
+    )
+    result = import_spins(db, io.StringIO(data), "spins.csv")
+    assert result == {"spins": 2, "tasks_created": 0, "rejected": 2, "skipped": 0}
+    assert db.get_task_frequency() == [("Stretch", 2)]
+
+def test_import_spins_creates_no_tasks_when_spins_fail(tmp_path, monkeypatch):
+    db = TaskDatabase(db_path=str(tmp_path / "spins.db"), local_only=True)
+    original = db.record_spins_bulk
+
+    def failing_record_spins_bulk(spins, batch_size=500, conn=None):
+        original(spins, batch_size=batch_size, conn=conn)
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(db, "record_spins_bulk", failing_record_spins_bulk)
+    data = "task_name,spun_at\nStretch,2024-01-05 09:00:00\n"
+    try:
+        import_spins(db, io.StringIO(data), "spins.csv")
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("import_spins should have failed")
+    assert db.get_all_tasks(active_only=False) == []
+    assert db.get_task_frequency() == []
@@ -0,0 +1,88 @@
+import sqlite3
+
+from database import TaskDatabase
+from migrations import MIGRATIONS, apply_migrations
+
+def _baseline_db(path: str):
+    # The schema and data of a database created before migrations existed
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_name TEXT NOT NULL,
+            category TEXT DEFAULT 'General',
+            priority INTEGER DEFAULT 1,
+            active INTEGER DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE spin_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER NOT NULL,
+            spun_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed INTEGER DEFAULT 0,
+            notes TEXT,
+            FOREIGN KEY (task_id) REFERENCES tasks (id)
+        );
+        INSERT INTO tasks (task_name, category) VALUES ('Bake bread', 'Home'), ('Write letter', 'Social');
+        INSERT INTO spin_history (task_id, spun_at, completed, notes) VALUES
+            (1, '2021-02-01 08:00:00', 1, 'sourdough'),
+            (1, '2021-02-02 08:00:00', 0, NULL),
+            (2, '2021-02-02 19:00:00', 1, 'to grandma');
+    """)
+    conn.commit()
+    conn.close()
+
+def test_upgrading_a_baseline_database(tmp_path):
+    path = str(tmp_path / "baseline.db")
+    _baseline_db(path)
+    db = TaskDatabase(db_path=path, local_only=True)
+
+    assert apply_migrations(db) == []
+    conn = sqlite3.connect(path)
+    versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    missing_updated_at = conn.execute("SELECT COUNT(*) FROM spin_history WHERE updated_at IS NULL").fetchone()[0]
+    conn.close()
+    assert versions == [version for version, _, _ in MIGRATIONS]
+    assert missing_updated_at == 0
+
+    assert db.get_task_frequency() == [("Bake bread", 2), ("Write letter", 1)]
+    aggregates = db.get_report_aggregates("2021-02-01", "2021-03-01")
+    assert (aggregates['totals']['spins'], aggregates['totals']['completed']) == (3, 2)
+    assert [r['notes'] for r in db.search_history("grandma")['rows']] == ["to grandma"]
+
+    # The migrated archive counts and completes like the hot table
+    assert db.archive_spins(horizon_days=365) == 3
+    spin_id = next(h['id'] for h in db.get_spin_history() if h['notes'] is None)
+    db.mark_spin_completed(spin_id, True)
+    aggregates = db.get_report_aggregates("2021-02-01", "2021-03-01")
+    assert (aggregates['totals']['spins'], aggregates['totals']['completed']) == (3, 3)
+    assert [r['notes'] for r in db.search_history("sourdough")['rows']] == ["sourdough"]
+
+def test_failed_migration_is_retried(tmp_path, monkeypatch):
+    import database
+
+    def failing_apply_migrations(db):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(database, "apply_migrations", failing_apply_migrations)
+    path = str(tmp_path / "retry.db")
+    TaskDatabase(db_path=path, local_only=True)
+    monkeypatch.undo()
+
+    db = TaskDatabase(db_path=path, local_only=True)
+    assert db.add_task("Water plants") > 0
+
+def test_rollup_counts_spins_with_null_completed(tmp_path):
+    path = str(tmp_path / "rollup.db")
+    db = TaskDatabase(db_path=path, local_only=True)
+    task_id = db.add_task("Fold laundry")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO spin_history (task_id, spun_at, completed) VALUES (?, '2024-03-01 09:00:00', NULL)",
+        (task_id,)
+    )
+    conn.execute("UPDATE spin_history SET spun_at = '2024-03-02 09:00:00' WHERE task_id = ?", (task_id,))
+    conn.commit()
+    rows = conn.execute("SELECT spin_date, spins, completed FROM spin_daily_rollup WHERE spins > 0").fetchall()
+    conn.close()
+    assert rows == [("2024-03-02", 1, 0)]
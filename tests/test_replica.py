@@ -0,0 +1,90 @@
+import sqlite3
+
+from database import TaskDatabase
+from turso_emulator import TursoEmulator
+
+def test_updated_spin_syncs_into_replica(tmp_path):
+    with TursoEmulator(str(tmp_path / "primary.db")).start() as emulator:
+        db = TaskDatabase(turso_url=emulator.url, turso_token="test",
+                          replica_path=str(tmp_path / "replica.db"))
+        task_id = db.add_task("Practice guitar")
+        spin_id = db.record_spin(task_id, "scales")
+        db.replica.sync(db)
+
+        # An update re-delivers a row the replica already has
+        db.complete_spin(spin_id, "learned a new song")
+        db.replica.sync(db)
+
+        history = db.get_spin_history()
+        assert [(h['id'], h['completed'], h['notes']) for h in history] == [(spin_id, 1, "learned a new song")]
+        results = db.search_history("song")['rows']
+        assert [r['id'] for r in results] == [spin_id]
+        assert db.search_history("scales")['rows'] == []
+
+def test_replica_counts_archived_spins(tmp_path):
+    with TursoEmulator(str(tmp_path / "primary.db")).start() as emulator:
+        db = TaskDatabase(turso_url=emulator.url, turso_token="test",
+                          replica_path=str(tmp_path / "replica.db"))
+        task_id = db.add_task("Water plants")
+        db.record_spins_bulk([
+            {"task_id": task_id, "spun_at": "2020-01-01 09:00:00", "completed": True},
+            {"task_id": task_id, "spun_at": "2020-01-02 09:00:00", "completed": False},
+        ])
+        db.record_spin(task_id)
+        # One replica saw the spins while they were hot, the other only
+        # ever sees them archived
+        db.replica.sync(db)
+        assert db.archive_spins(horizon_days=365) == 2
+        db.replica.sync(db)
+        fresh = TaskDatabase(turso_url=emulator.url, turso_token="test",
+                             replica_path=str(tmp_path / "fresh.db"))
+        fresh.replica.sync(fresh)
+
+        for replica_db in (db.replica.local_db, fresh.replica.local_db):
+            assert replica_db.get_task_frequency() == [("Water plants", 3)]
+            assert round(replica_db.get_completion_rate(), 1) == 33.3
+
+def test_completing_an_archived_spin(tmp_path):
+    with TursoEmulator(str(tmp_path / "primary.db")).start() as emulator:
+        db = TaskDatabase(turso_url=emulator.url, turso_token="test",
+                          replica_path=str(tmp_path / "replica.db"))
+        task_id = db.add_task("File taxes")
+        db.record_spins_bulk([{"task_id": task_id, "spun_at": "2020-04-01 09:00:00", "completed": False}])
+        db.archive_spins(horizon_days=365)
+        spin_id = db.get_spin_history()[0]['id']
+
+        db.mark_spin_completed(spin_id, True)
+
+        assert db.get_spin_history()[0]['completed'] == 1
+        assert db.get_completion_rate() == 100.0
+
+def test_report_aggregates_read_the_replica(tmp_path):
+    with TursoEmulator(str(tmp_path / "primary.db")).start() as emulator:
+        db = TaskDatabase(turso_url=emulator.url, turso_token="test",
+                          replica_path=str(tmp_path / "replica.db"))
+        task_id = db.add_task("Read a chapter")
+        db.record_spins_bulk([{"task_id": task_id, "spun_at": "2024-03-04 09:00:00", "completed": True}])
+        db.replica.sync(db)
+
+        statements = emulator.stats["statements"]
+        aggregates = db.get_report_aggregates("2024-03-01", "2024-04-01")
+        assert aggregates["totals"]["spins"] == 1
+        assert aggregates["by_task"][0]["task_name"] == "Read a chapter"
+        assert emulator.stats["statements"] == statements
+
+def test_cached_reads_see_other_processes_after_a_sync(tmp_path):
+    path = str(tmp_path / "primary.db")
+    with TursoEmulator(path).start() as emulator:
+        db = TaskDatabase(turso_url=emulator.url, turso_token="test",
+                          replica_path=str(tmp_path / "replica.db"))
+        db.add_task("Walk the dog")
+        assert db.get_task_count() == 1
+        # Another process writes to the primary; this one's cache isn't told
+        conn = sqlite3.connect(path)
+        conn.execute("INSERT INTO tasks (task_name) VALUES ('Mow the lawn')")
+        conn.commit()
+        conn.close()
+        assert db.get_task_count() == 1
+
+        db.replica.sync_interval = 0
+        assert db.get_task_count() == 2
@@ -0,0 +1,70 @@
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+
+from database import TaskDatabase
+from reports import _daily_report, report_is_current, save_period_report
+
+def _utc_ms(seconds_ago: float) -> str:
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+def test_late_commit_after_a_build_is_seen(tmp_path):
+    db = TaskDatabase(db_path=str(tmp_path / "spins.db"), local_only=True)
+    task_id = db.add_task("Meditate")
+    db.record_spins_bulk([{"task_id": task_id, "spun_at": "2024-06-03 07:00:00"}])
+    conn = db.get_connection()
+    conn.execute("UPDATE tasks SET updated_at = ?", (_utc_ms(60),))
+    conn.execute("UPDATE spin_history SET updated_at = ?", (_utc_ms(60),))
+    conn.commit()
+    conn.close()
+    # A write to another period is the newest row when June is built
+    db.record_spins_bulk([{"task_id": task_id, "spun_at": "2024-07-01 07:00:00"}])
+    saved = {"data_version": db.get_data_version()}
+    assert report_is_current(db, saved, date(2024, 6, 1), date(2024, 7, 1))
+
+    # A transaction that stamped its row before that write, and only
+    # committed after the build read the version
+    conn = db.get_connection()
+    conn.execute(
+        "INSERT INTO spin_history (task_id, spun_at, updated_at) VALUES (?, ?, ?)",
+        (task_id, "2024-06-03 08:00:00", _utc_ms(1))
+    )
+    conn.commit()
+    conn.close()
+
+    db.data_changed()
+    assert not report_is_current(db, saved, date(2024, 6, 1), date(2024, 7, 1))
+
+def test_daily_report_lists_legacy_spun_at(tmp_path):
+    db = TaskDatabase(db_path=str(tmp_path / "spins.db"), local_only=True)
+    task_id = db.add_task("Sweep porch")
+    db.record_spins_bulk([
+        {"task_id": task_id, "spun_at": "2024-01-05 09:00:00"},
+        {"task_id": task_id, "spun_at": "2024-01-05 17:30:00"}
+    ])
+    # A legacy value written before spun_at was normalized
+    conn = db.get_connection()
+    conn.execute("INSERT INTO spin_history (task_id, spun_at) VALUES (?, '2024-01-05 at noon')", (task_id,))
+    conn.commit()
+    conn.close()
+    db.data_changed()
+
+    report = _daily_report(db, date(2024, 1, 5), date(2024, 1, 6), date(2024, 1, 10))
+    assert "- **Total Spins:** 3" in report
+    assert "**Sweep porch** (General) - --:--" in report
+    # Newest first, as get_spin_history listed them
+    assert report.index("05:30 PM") < report.index("09:00 AM")
+
+def test_saved_report_sees_writes_from_other_processes(tmp_path):
+    path = str(tmp_path / "spins.db")
+    db = TaskDatabase(db_path=path, local_only=True)
+    task_id = db.add_task("Meditate")
+    db.record_spins_bulk([{"task_id": task_id, "spun_at": "2024-06-03 07:00:00"}])
+    assert db.get_report_aggregates(date(2024, 6, 1), date(2024, 7, 1))['totals']['spins'] == 1
+    # Written by another process, so this one's query cache isn't told
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO spin_history (task_id, spun_at) VALUES (?, '2024-06-04 07:00:00')", (task_id,))
+    conn.commit()
+    conn.close()
+
+    content = save_period_report(db, "monthly", date(2024, 6, 1), date(2024, 7, 1))
+    assert "**Total Spins:** 2" in content
@@ -0,0 +1,40 @@
+from database import TaskDatabase
+from write_behind import WriteBehindQueue
+
+def _queue(tmp_path, db):
+    # No worker thread; the tests flush
+    return WriteBehindQueue(db, journal_path=str(tmp_path / "journal.jsonl"), start=False)
+
+def test_rejected_write_does_not_block_the_queue(tmp_path):
+    db = TaskDatabase(db_path=str(tmp_path / "spins.db"), local_only=True)
+    task_id = db.add_task("Tidy desk")
+    queue = _queue(tmp_path, db)
+
+    queue.record_spin(None)  # NOT NULL constraint failure
+    good = queue.record_spin(task_id, "first")
+    queue.complete_spin(good)
+    assert queue.flush() == 3
+
+    assert queue.pending_count() == 0
+    history = db.get_spin_history()
+    assert [(h['task_id'], h['notes'], h['completed']) for h in history] == [(task_id, "first", 1)]
+    failed = queue.failed_ops()
+    assert len(failed) == 1 and "NOT NULL" in failed[0]['error']
+
+def test_journal_replays_after_a_restart(tmp_path):
+    db = TaskDatabase(db_path=str(tmp_path / "spins.db"), local_only=True)
+    task_id = db.add_task("Tidy desk")
+    queue = _queue(tmp_path, db)
+    spin_id = queue.record_spin(task_id)
+    queue.complete_spin(spin_id, "done")
+
+    replayed = _queue(tmp_path, db)
+    assert replayed.pending_count() == 2
+    while replayed.flush():
+        pass
+    # A second replay of the same ops doesn't insert the spin twice
+    replayed._pending = queue._pending
+    while replayed.flush():
+        pass
+    history = db.get_spin_history()
+    assert [(h['notes'], h['completed']) for h in history] == [("done", 1)]
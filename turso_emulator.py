@@ -0,0 +1,315 @@
+import argparse
+import base64
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+# A local stand-in for Turso's HTTP API: the execute, close and batch
+# requests of /v2/pipeline, served from a SQLite file. Latency, jitter, a
+# slow tail and failures can be injected, so the HTTP path (pooling,
+# pipelining, retries, hedging, the circuit breaker) can be exercised and
+# benchmarked offline:
+#
+#   python turso_emulator.py --db task_spinner.db --port 8080 --latency-ms 40 --jitter-ms 20
+#
+# and point [turso] database_url at http://127.0.0.1:8080.
+
+def decode_value(arg: Dict):
+    kind = arg.get("type")
+    if kind == "null":
+        return None
+    if kind == "integer":
+        return int(arg["value"])
+    if kind == "float":
+        return float(arg["value"])
+    if kind == "blob":
+        return base64.b64decode(arg["base64"])
+    return arg.get("value")
+
+def encode_value(value) -> Dict:
+    if value is None:
+        return {"type": "null"}
+    if isinstance(value, int):
+        return {"type": "integer", "value": str(value)}
+    if isinstance(value, float):
+        return {"type": "float", "value": value}
+    if isinstance(value, bytes):
+        return {"type": "blob", "base64": base64.b64encode(value).decode("ascii")}
+    return {"type": "text", "value": str(value)}
+
+class Stream:
+    # One SQLite connection per open stream, like a server-side session
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(db_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    def execute(self, stmt: Dict) -> Dict:
+        if "named_args" in stmt and stmt["named_args"]:
+            params = {a["name"].lstrip(":@$"): decode_value(a["value"]) for a in stmt["named_args"]}
+        else:
+            params = [decode_value(a) for a in stmt.get("args", [])]
+        cursor = self.conn.execute(stmt["sql"], params)
+        rows = cursor.fetchall() if cursor.description else []
+        return {
+            "cols": [{"name": d[0], "decltype": None} for d in cursor.description or []],
+            "rows": [[encode_value(v) for v in row] for row in rows] if stmt.get("want_rows", True) else [],
+            "affected_row_count": max(cursor.rowcount, 0),
+            "last_insert_rowid": str(cursor.lastrowid) if cursor.lastrowid else None
+        }
+
+    def condition_holds(self, cond: Optional[Dict], step_results: List, step_errors: List) -> bool:
+        if cond is None:
+            return True
+        kind = cond["type"]
+        if kind == "ok":
+            return step_results[cond["step"]] is not None
+        if kind == "error":
+            return step_errors[cond["step"]] is not None
+        if kind == "not":
+            return not self.condition_holds(cond["cond"], step_results, step_errors)
+        if kind == "and":
+            return all(self.condition_holds(c, step_results, step_errors) for c in cond["conds"])
+        if kind == "or":
+            return any(self.condition_holds(c, step_results, step_errors) for c in cond["conds"])
+        if kind == "is_autocommit":
+            return not self.conn.in_transaction
+        raise ValueError(f"unknown batch condition: {kind}")
+
+    def batch(self, batch: Dict) -> Dict:
+        steps = batch.get("steps", [])
+        step_results = [None] * len(steps)
+        step_errors = [None] * len(steps)
+        for i, step in enumerate(steps):
+            if not self.condition_holds(step.get("condition"), step_results, step_errors):
+                continue
+            try:
+                step_results[i] = self.execute(step["stmt"])
+            except sqlite3.Error as e:
+                step_errors[i] = {"message": str(e)}
+        return {"step_results": step_results, "step_errors": step_errors}
+
+    def close(self):
+        self.conn.close()
+
+class TursoEmulator:
+    def __init__(self, db_path: str, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 tail_rate: float = 0.0, tail_ms: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, drop_rate: float = 0.0,
+                 auth_token: str = None, stream_timeout: float = 10.0, seed: int = None):
+        self.db_path = db_path
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tail_rate = tail_rate
+        self.tail_ms = tail_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.drop_rate = drop_rate
+        self.auth_token = auth_token
+        self.stream_timeout = stream_timeout
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "statements": 0, "errors": 0, "throttled": 0, "dropped": 0, "unauthorized": 0}
+        self._streams = {}
+        self._lock = threading.Lock()
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.close()
+
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    def _roll(self) -> float:
+        with self._lock:
+            return self.random.random()
+
+    def delay(self) -> float:
+        # Seconds to wait before answering: base latency, uniform jitter and
+        # an occasional slow response
+        with self._lock:
+            ms = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+            if self.tail_rate and self.random.random() < self.tail_rate:
+                ms += self.tail_ms
+        return ms / 1000
+
+    def injected_fault(self) -> Optional[str]:
+        # At most one fault per request, decided before anything is executed
+        roll = self._roll()
+        for fault, rate in (("drop", self.drop_rate), ("error", self.error_rate), ("throttle", self.throttle_rate)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+    def _open_stream(self, baton: Optional[str]) -> Stream:
+        with self._lock:
+            now = time.monotonic()
+            expired = [b for b, s in self._streams.items() if now - s.last_used > self.stream_timeout]
+            for b in expired:
+                self._streams.pop(b).close()
+            if baton is None:
+                return Stream(self.db_path)
+            if baton not in self._streams:
+                raise KeyError("stream expired or baton is invalid")
+            return self._streams.pop(baton)
+
+    def pipeline(self, body: Dict) -> Dict:
+        stream = self._open_stream(body.get("baton"))
+        results = []
+        closed = False
+        with stream.lock:
+            for request in body.get("requests", []):
+                kind = request.get("type")
+                try:
+                    if kind == "execute":
+                        self._count("statements")
+                        response = {"type": "execute", "result": stream.execute(request["stmt"])}
+                    elif kind == "batch":
+                        self._count("statements", len(request["batch"].get("steps", [])))
+                        response = {"type": "batch", "result": stream.batch(request["batch"])}
+                    elif kind == "close":
+                        closed = True
+                        response = {"type": "close"}
+                    else:
+                        raise ValueError(f"unsupported request type: {kind}")
+                    results.append({"type": "ok", "response": response})
+                except (sqlite3.Error, ValueError, KeyError) as e:
+                    results.append({"type": "error", "error": {"message": str(e)}})
+
+        baton = None
+        if closed:
+            stream.close()
+        else:
+            stream.last_used = time.monotonic()
+            baton = uuid.uuid4().hex
+            with self._lock:
+                self._streams[baton] = stream
+        return {"baton": baton, "base_url": None, "results": results}
+
+    def _handler(self):
+        emulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this,
+            # keep-alive responses wait on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, payload: Dict):
+                out = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def do_GET(self):
+                if self.path == "/v2":
+                    self._reply(200, {})
+                elif self.path == "/stats":
+                    with emulator._lock:
+                        self._reply(200, dict(emulator.stats, open_streams=len(emulator._streams)))
+                else:
+                    self._reply(404, {"message": "not found"})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                emulator._count("requests")
+                if self.path != "/v2/pipeline":
+                    self._reply(404, {"message": "not found"})
+                    return
+                if emulator.auth_token and self.headers.get("Authorization") != f"Bearer {emulator.auth_token}":
+                    emulator._count("unauthorized")
+                    self._reply(401, {"message": "unauthorized"})
+                    return
+
+                time.sleep(emulator.delay())
+                fault = emulator.injected_fault()
+                if fault == "drop":
+                    # The client sees the connection close with no response
+                    emulator._count("dropped")
+                    self.close_connection = True
+                    return
+                if fault == "error":
+                    emulator._count("errors")
+                    self._reply(503, {"message": "injected error"})
+                    return
+                if fault == "throttle":
+                    emulator._count("throttled")
+                    self._reply(429, {"message": "injected throttling"})
+                    return
+
+                try:
+                    response = emulator.pipeline(json.loads(body))
+                except KeyError as e:
+                    self._reply(400, {"message": str(e)})
+                    return
+                self._reply(200, response)
+
+        return Handler
+
+    def start(self) -> "TursoEmulator":
+        threading.Thread(target=self.server.serve_forever, name="turso-emulator", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        with self._lock:
+            streams, self._streams = self._streams, {}
+        for stream in streams.values():
+            stream.close()
+
+    def __enter__(self) -> "TursoEmulator":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a SQLite file over Turso's /v2/pipeline HTTP API")
+    parser.add_argument("--db", default="task_spinner.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform extra delay, 0 to this")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="share of requests that are slow")
+    parser.add_argument("--tail-ms", type=float, default=0.0, help="extra delay for slow requests")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share answered with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share answered with 429")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share dropped without a response")
+    parser.add_argument("--auth-token", help="require this bearer token")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    emulator = TursoEmulator(
+        args.db, args.host, args.port,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        tail_rate=args.tail_rate, tail_ms=args.tail_ms,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, drop_rate=args.drop_rate,
+        auth_token=args.auth_token, seed=args.seed
+    )
+    print(f"Serving {args.db} at {emulator.url}/v2/pipeline")
+    try:
+        emulator.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Union
+
+from database import TursoStatementError, secret_settings
+
+PROVISIONAL_PREFIX = "pending-"
+
+# Writing these again gives the same error, so retrying would hold up the
+# queue for good. Anything else (timeouts, 5xx, 429, a locked database) is
+# retried with backoff.
+PERMANENT_ERRORS = (sqlite3.IntegrityError, sqlite3.DataError, TursoStatementError)
+
+def is_provisional(spin_id) -> bool:
+    return isinstance(spin_id, str) and spin_id.startswith(PROVISIONAL_PREFIX)
+
+class WriteBehindQueue:
+    # Spins and completions are acknowledged as soon as they are appended to
+    # a local journal file. A background thread writes them to the database
+    # in batches and retries with backoff until they land.
+    #
+    # Every queued spin carries a client_id (its provisional id). The column
+    # is unique, so replaying the journal after a crash never inserts a spin
+    # twice. Completions can target a spin before its row id is known.
+    #
+    # Operations the database rejects outright are moved to a dead-letter
+    # file next to the journal, so they don't block the ones behind them.
+    def __init__(self, db, journal_path: str = "task_spinner_journal.jsonl",
+                 flush_interval: float = 0.5, batch_size: int = 100, max_retry_delay: float = 30.0,
+                 start: bool = True):
+        self.db = db
+        self.journal_path = journal_path
+        self.dead_letter_path = os.path.splitext(journal_path)[0] + ".failed.jsonl"
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_retry_delay = max_retry_delay
+        self.failures = 0
+        self.last_error = None
+        self._pending = self._load_journal()
+        self._journal_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+
+        self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        if start:
+            self._worker.start()
+            atexit.register(self.close)
+
+    def _load_journal(self) -> List[Dict]:
+        if not os.path.exists(self.journal_path):
+            return []
+        ops = []
+        with open(self.journal_path, encoding="utf-8") as journal:
+            for line in journal:
+                line = line.strip()
+                if line:
+                    try:
+                        ops.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-append
+                        print(f"Skipping unreadable journal entry: {line[:80]}")
+        if ops:
+            print(f"Replaying {len(ops)} queued writes from {self.journal_path}")
+        return ops
+
+    def _enqueue(self, op: Dict):
+        with self._journal_lock:
+            with open(self.journal_path, "a", encoding="utf-8") as journal:
+                journal.write(json.dumps(op) + "\n")
+                journal.flush()
+                os.fsync(journal.fileno())
+            self._pending.append(op)
+        self._wakeup.set()
+
+    def record_spin(self, task_id: int, notes: str = "") -> str:
+        spin_id = f"{PROVISIONAL_PREFIX}{uuid.uuid4().hex}"
+        self._enqueue({
+            "op": "spin",
+            "client_id": spin_id,
+            "task_id": task_id,
+            "notes": notes,
+            # Same UTC text format as CURRENT_TIMESTAMP
+            "spun_at": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        })
+        return spin_id
+
+    def complete_spin(self, spin_id: Union[int, str], notes: str = ""):
+        self._enqueue({"op": "complete", "spin_id": spin_id, "notes": notes})
+
+    def pending_count(self) -> int:
+        with self._journal_lock:
+            return len(self._pending)
+
+    def _statements(self, batch: List[Dict]) -> List[tuple]:
+        statements = []
+        for op in batch:
+            if op["op"] == "spin":
+                statements.append((
+                    "INSERT INTO spin_history (task_id, spun_at, notes, client_id) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(client_id) DO NOTHING",
+                    (op["task_id"], op["spun_at"], op["notes"], op["client_id"])
+                ))
+            elif op["op"] == "complete":
+                column = "client_id" if is_provisional(op["spin_id"]) else "id"
+                statements.append((
+                    f"UPDATE spin_history SET completed = 1 WHERE {column} = ?",
+                    (op["spin_id"],)
+                ))
+                if op["notes"]:
+                    statements.append((
+                        f"UPDATE spin_history SET notes = ? WHERE {column} = ?",
+                        (op["notes"], op["spin_id"])
+                    ))
+        return statements
+
+    def failed_ops(self) -> List[Dict]:
+        # Operations the database rejected, oldest first, with their error
+        if not os.path.exists(self.dead_letter_path):
+            return []
+        with open(self.dead_letter_path, encoding="utf-8") as dead_letters:
+            return [json.loads(line) for line in dead_letters if line.strip()]
+
+    def _write(self, batch: List[Dict]):
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            statements = self._statements(batch)
+            if self.db.use_turso:
+                cursor.execute_many_statements(statements)
+            else:
+                for sql, params in statements:
+                    cursor.execute(sql, params)
+
+    def _dead_letter(self, op: Dict, error: Exception):
+        print(f"Write-behind dropped a {op['op']} the database rejected: {error}")
+        with open(self.dead_letter_path, "a", encoding="utf-8") as dead_letters:
+            dead_letters.write(json.dumps({**op, "error": str(error)}) + "\n")
+            dead_letters.flush()
+            os.fsync(dead_letters.fileno())
+
+    def _done(self, count: int):
+        with self._journal_lock:
+            del self._pending[:count]
+            self._rewrite_journal()
+
+    def flush(self) -> int:
+        # Writes the oldest queued batch in one transaction and returns how
+        # many operations it held
+        with self._flush_lock:
+            with self._journal_lock:
+                batch = list(self._pending[:self.batch_size])
+            if not batch:
+                return 0
+
+            try:
+                self._write(batch)
+            except PERMANENT_ERRORS:
+                # Something in the batch can never be written. Write it one
+                # operation at a time to set aside only the bad ones; the
+                # rest are safe to repeat if this is interrupted.
+                for op in batch:
+                    try:
+                        self._write([op])
+                    except PERMANENT_ERRORS as e:
+                        self._dead_letter(op, e)
+                    self._done(1)
+                return len(batch)
+
+            self._done(len(batch))
+            return len(batch)
+
+    def _rewrite_journal(self):
+        # Called with the journal lock held
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as journal:
+            for op in self._pending:
+                journal.write(json.dumps(op) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                while self.flush():
+                    pass
+                self.failures = 0
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                delay = min(self.max_retry_delay, self.flush_interval * (2 ** self.failures))
+                print(f"Write-behind flush failed ({self.failures}x), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def close(self):
+        # Best effort on shutdown; whatever is left stays in the journal
+        self._stopped = True
+        self._wakeup.set()
+        try:
+            while self.flush():
+                pass
+        except Exception as e:
+            print(f"Write-behind queue left {self.pending_count()} writes in the journal: {e}")
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+def get_write_behind_queue(db) -> Optional[WriteBehindQueue]:
+    # None unless [write_behind] enabled = true; one queue per process
+    settings = secret_settings("write_behind")
+    if not settings.get("enabled", False):
+        return None
+    journal_path = os.path.abspath(settings.get("journal_path", "task_spinner_journal.jsonl"))
+    with _queues_lock:
+        if journal_path not in _queues:
+            _queues[journal_path] = WriteBehindQueue(
+                db,
+                journal_path=journal_path,
+                flush_interval=float(settings.get("flush_interval", 0.5)),
+                batch_size=int(settings.get("batch_size", 100))
+            )
+        return _queues[journal_path]